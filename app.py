@@ -1,8 +1,12 @@
 import streamlit as st
-import asyncio
 import logging
-from chat import process_message, reset_chat_history
-from multi_agent import run_multi_agent
+import threading
+import time
+import uuid
+from chat import reset_chat_history, stream_message
+from jobs import FAILED, CANCELLED, FINISHED, QUEUED, JobRunner
+from multi_agent import stream_multi_agent
+from runtime import get_runtime
 
 
 #Configure logging
@@ -12,8 +16,8 @@ def configure_sidebar():
     """Configure the sidebar with navigation options"""
     if "selected_option" not in st.session_state:
         st.session_state.selected_option = "Multi-Agent"
-    # if st.sidebar.button("💬 Chat"):
-    #     st.session_state.selected_option = "Chat"
+    if st.sidebar.button("💬 Chat"):
+        st.session_state.selected_option = "Chat"
     if st.sidebar.button("🤖 Multi-Agent"):
         st.session_state.selected_option = "Multi-Agent"
         
@@ -29,9 +33,12 @@ def render_chat_ui(title, on_submit):
         if st.button("➕ New Chat"):
             if title == "Chat":
                 st.session_state.chat_history = []
-                reset_chat_history()
+                reset_chat_history(session_id())
             elif title == "Multi-Agent":
                 st.session_state.multi_agent_history = []
+                if st.session_state.get("multi_agent_job"):
+                    job_runner().cancel(st.session_state.multi_agent_job)
+                    st.session_state.multi_agent_job = None
   
     # Styling adjustments for the form
     st.markdown(
@@ -54,6 +61,13 @@ def render_chat_ui(title, on_submit):
         if send_clicked:
             on_submit(user_input)
 
+def session_id():
+    """A stable id for this browser session: its chat history key and its scheduler tenant."""
+    if "tenant" not in st.session_state:
+        st.session_state.tenant = uuid.uuid4().hex
+    return st.session_state.tenant
+
+
 def chat():
     """Chat functionality."""
     if "chat_history" not in st.session_state:
@@ -61,48 +75,81 @@ def chat():
 
     def on_chat_submit(user_input):
         if user_input:
+            # The reply so far; the finished exchange is drawn with the rest of the history
+            placeholder = st.empty()
+            parts, last_render = [], 0.0
             try:
-                # Append user message to Chat history
+                # Streamed on the job runner's loop, which keeps the model connections warm between messages
+                for delta in job_runner().iterate(stream_message(user_input, session_id())):
+                    parts.append(delta)
+                    # Redrawing on every token is wasteful; a few frames a second reads as live
+                    now = time.monotonic()
+                    if now - last_render >= 0.05:
+                        placeholder.markdown(f"**User**: {user_input}\n\n**assistant**: {''.join(parts)}")
+                        last_render = now
+                # Append the exchange to Chat history
                 st.session_state.chat_history.append({"role": "user", "message": user_input})
-                with st.spinner("Processing your request.."):
-                    # Get assistant's response
-                    assistant_response = asyncio.run(process_message(user_input))
-                st.session_state.chat_history.append({"role": "assistant", "message": assistant_response})
+                st.session_state.chat_history.append({"role": "assistant", "message": "".join(parts)})
             except Exception as e:
                 logging.error(f"Error processing message: {e}")
                 st.error("An error occurred while processing your message.")
-        
-    # Display chat history
-        display_chat_history(st.session_state.chat_history)
+            finally:
+                placeholder.empty()
 
     render_chat_ui("Chat", on_chat_submit)
+    display_chat_history(st.session_state.chat_history)
+
+@st.cache_resource
+def job_runner():
+    """One job runner per server process, shared by every session."""
+    # Build the kernel and agents in the background while the first page renders,
+    # instead of on the first request
+    threading.Thread(target=get_runtime, name="runtime-warmup", daemon=True).start()
+    return JobRunner(stream_multi_agent)
+
 
 def multi_agent():
     """Handles multi-agent system."""
     if "multi_agent_history" not in st.session_state:
         st.session_state.multi_agent_history = []
-
     def on_multi_agent_submit(user_input):
         if user_input:
-            try:
-                st.session_state.multi_agent_history.append({"role": "user", "message": user_input})
-                with st.spinner("Agents are collaborating..."):
-                    result = asyncio.run(run_multi_agent(user_input))
-                    # Fix: Extract messages from the result dictionary and map content to message
-                    for response in result["messages"]:
-                        st.session_state.multi_agent_history.append({
-                            "role": response["role"],
-                            "message": response["content"]
-                        })
+            if st.session_state.get("multi_agent_job"):
+                st.warning("The agents are still working on your previous request.")
+                return
+            st.session_state.multi_agent_history.append({"role": "user", "message": user_input})
+            # Runs in the background; this script run returns immediately and the page polls for progress
+            st.session_state.multi_agent_job = job_runner().submit(user_input, tenant=session_id())
 
-            except Exception as e:
-                logging.error(f"Error in multi-agent system: {e}")
-                st.error("An error occurred while processing the multi-agent request.")
-        
-    #Display multi-agent chat history
-        display_chat_history(st.session_state.multi_agent_history)
-        
     render_chat_ui("Multi-Agent", on_multi_agent_submit)
+    display_chat_history(st.session_state.multi_agent_history)
+    multi_agent_progress()
+
+
+@st.fragment(run_every=0.5)
+def multi_agent_progress():
+    """Show the running job's replies so far; once it finishes, move them into the history."""
+    job_id = st.session_state.get("multi_agent_job")
+    if not job_id:
+        return
+    job = job_runner().get(job_id)
+    if job is None or job.status in FINISHED:
+        st.session_state.multi_agent_job = None
+        if job is not None:
+            for reply in job.replies:
+                st.session_state.multi_agent_history.append({"role": reply.agent, "message": reply.text})
+            if job.status == FAILED:
+                logging.error(f"Error in multi-agent system: {job.error}")
+                st.session_state.multi_agent_history.append(
+                    {"role": "system", "message": "An error occurred while processing the multi-agent request."})
+            elif job.status == CANCELLED:
+                st.session_state.multi_agent_history.append({"role": "system", "message": "Request cancelled."})
+        st.rerun()
+
+    display_chat_history([{"role": reply.agent, "message": reply.text} for reply in job.replies])
+    st.caption("⏳ Waiting for a free slot..." if job.status == QUEUED else "🤖 Agents are collaborating...")
+    if st.button("Cancel"):
+        job_runner().cancel(job_id)
 
 
 def display_chat_history(chat_history):
@@ -117,6 +164,7 @@ def display_chat_history(chat_history):
 def main():
     """Main function to run the app."""
     # st.set_page_config(page_title="AI Workshop", layout="wide")
+    job_runner()  # the first page load starts the runtime warm-up
     chosen_operation = configure_sidebar()
     st.markdown("<h2 style='text-align:center;'>Welcome to the AI Workshop for Developers</h2>", unsafe_allow_html=True)
     if chosen_operation == "Chat":
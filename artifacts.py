@@ -0,0 +1,158 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+# Fence info strings mapped to artifact kinds
+LANGUAGE_KINDS = {
+    "html": "html",
+    "htm": "html",
+    "css": "css",
+    "js": "js",
+    "javascript": "js",
+}
+
+
+@dataclass
+class Artifact:
+    kind: str      # "html", "css" or "js"
+    code: str
+    fenced: bool   # False for a bare <!DOCTYPE html> ... </html> document in prose
+    start: int = 0  # span in the fed text, fences included
+    end: int = 0
+
+
+class ArtifactExtractor:
+    """Incremental tokenizer for code artifacts in agent messages.
+
+    Feed message text in any number of chunks; every character is looked at
+    a bounded number of times, so the cost is linear in the message length
+    no matter how the output is formatted. Recognizes:
+
+    - fenced code blocks (``` or ~~~) labelled html/css/js, or unlabelled
+      blocks that contain an HTML document
+    - bare `<!DOCTYPE html> ... </html>` documents outside any fence
+
+    State (an open fence or document, a partial line) carries across
+    `feed` calls. At the end, `close` keeps a fence left open only if it
+    holds a whole HTML document (up to `</html>`), since a truncated reply
+    is not a usable artifact; `close(partial=True)` flushes any open fence,
+    for callers showing output while it streams.
+    Artifact spans are offsets into everything fed so far.
+    """
+
+    def __init__(self):
+        self._partial: list[str] = []
+        self._fence: Optional[str] = None
+        self._language = ""
+        self._lines: list[str] = []
+        self._document: Optional[list[str]] = None
+        self._position = 0
+        self._start = 0
+
+    def feed(self, text: str) -> list[Artifact]:
+        """Consume a chunk and return the artifacts completed by it."""
+        artifacts: list[Artifact] = []
+        end = text.find("\n")
+        if end == -1:
+            # Buffer pieces rather than concatenating, so long lines stay linear
+            self._partial.append(text)
+            return artifacts
+        self._partial.append(text[:end + 1])
+        self._line("".join(self._partial), artifacts)
+        start = end + 1
+        while True:
+            end = text.find("\n", start)
+            if end == -1:
+                break
+            self._line(text[start:end + 1], artifacts)
+            start = end + 1
+        self._partial = [text[start:]] if start < len(text) else []
+        return artifacts
+
+    def close(self, partial: bool = False) -> list[Artifact]:
+        """Flush the trailing partial line, and the fence left open if complete or `partial`."""
+        artifacts: list[Artifact] = []
+        if self._partial:
+            self._line("".join(self._partial), artifacts)
+            self._partial = []
+        if self._fence is not None:
+            self._emit_fenced(artifacts, closed=False, partial=partial)
+        elif self._document is not None:
+            self._document = None
+        return artifacts
+
+    def _line(self, line: str, artifacts: list[Artifact]):
+        line_start = self._position
+        self._position += len(line)
+        stripped = line.strip()
+        if self._fence is not None:
+            if stripped.startswith(self._fence) and not stripped.strip(self._fence[0]):
+                self._emit_fenced(artifacts)
+            else:
+                self._lines.append(line)
+            return
+
+        if stripped.startswith("```") or stripped.startswith("~~~"):
+            marker = stripped[0]
+            length = len(stripped) - len(stripped.lstrip(marker))
+            self._fence = marker * length
+            self._start = line_start
+            info = stripped[length:].strip()
+            self._language = info.split()[0].lower() if info else ""
+            self._lines = []
+            self._document = None
+            return
+
+        lowered = line.lower()
+        if self._document is None:
+            begin = lowered.find("<!doctype html")
+            if begin == -1:
+                return
+            self._document = []
+            self._start = line_start + begin
+            line, lowered = line[begin:], lowered[begin:]
+            line_start += begin
+        finish = lowered.find("</html>")
+        if finish == -1:
+            self._document.append(line)
+            return
+        self._document.append(line[:finish + len("</html>")])
+        artifacts.append(Artifact("html", "".join(self._document).strip(), fenced=False,
+                                  start=self._start, end=line_start + finish + len("</html>")))
+        self._document = None
+
+    def _emit_fenced(self, artifacts: list[Artifact], closed: bool = True, partial: bool = False):
+        code = "".join(self._lines).strip()
+        kind = LANGUAGE_KINDS.get(self._language)
+        if kind is None and not self._language:
+            head = code[:200].lower()
+            if "<!doctype html" in head or "<html" in head:
+                kind = "html"
+        if not (closed or partial) and not (kind == "html" and "</html>" in code[-200:].lower()):
+            kind = None
+        if kind is not None and code:
+            artifacts.append(Artifact(kind, code, fenced=True, start=self._start, end=self._position))
+        self._fence = None
+        self._language = ""
+        self._lines = []
+
+
+def extract_artifacts(chunks: Iterable[str], partial: bool = False) -> list[Artifact]:
+    extractor = ArtifactExtractor()
+    artifacts: list[Artifact] = []
+    for chunk in chunks:
+        artifacts.extend(extractor.feed(chunk))
+    artifacts.extend(extractor.close(partial))
+    return artifacts
+
+
+def extract_html(text: str, min_length: int = 0) -> Optional[str]:
+    """Return the longest complete HTML artifact in `text`, if it has at least `min_length` characters.
+
+    Only closed fences and documents that reach `</html>` count, so a reply
+    cut off mid-page is never taken for the finished page.
+    """
+    candidates = [artifact.code for artifact in extract_artifacts([text]) if artifact.kind == "html"]
+    if not candidates:
+        return None
+    html_code = max(candidates, key=len)
+    return html_code if len(html_code) >= min_length else None
@@ -0,0 +1,158 @@
+"""Artifact extraction: streaming tokenizer vs. the old regex cascade.
+
+Generates agent-style replies of increasing size (discussion prose plus a
+fenced HTML page with inline CSS/JS, an unterminated variant where the
+model was cut off mid-page, and a discussion-only reply) and times, per reply:
+
+- the regex cascade run_multi_agent used before artifacts.ArtifactExtractor
+  (substring heuristic, then the streaming pattern list, then the history
+  fallback patterns)
+- artifacts.extract_html on the whole reply
+- artifacts.ArtifactExtractor fed the reply in small streamed chunks
+
+    python benchmarks/artifact_extraction.py --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from artifacts import ArtifactExtractor, extract_html  # noqa: E402
+
+STREAM_PATTERNS = [
+    r'```html\s*(<!DOCTYPE.*?</html>)\s*```',
+    r'```html\s*(.*?</html>)\s*```',
+    r'```HTML\s*(<!DOCTYPE.*?</html>)\s*```',
+    r'```\s*html\s*(<!DOCTYPE.*?</html>)\s*```',
+    r'```\s*(<!DOCTYPE html.*?</html>)\s*```',
+    r'```[^`]*?(<!DOCTYPE html.*?</html>)[^`]*?```',
+    r'(<!DOCTYPE html.*?</html>)',
+    r'```html\s*(.*?)\s*```',
+    r'```\s*(.*?calculator.*?</html>)\s*```',
+]
+
+HISTORY_PATTERNS = [
+    r'```html\s*(<!DOCTYPE.*?</html>)\s*```',
+    r'```html\s*(.*?</html>)\s*```',
+    r'```HTML\s*(<!DOCTYPE.*?</html>)\s*```',
+    r'```\s*html\s*(<!DOCTYPE.*?</html>)\s*```',
+    r'```\s*(<!DOCTYPE html.*?</html>)\s*```',
+    r'(<!DOCTYPE html.*?</html>)',
+    r'(<html.*?</html>)',
+    r'```[^`]*?(<!DOCTYPE html.*?</html>)[^`]*?```',
+    r'```[^`]*?(<html.*?</html>)[^`]*?```',
+    r'```html\s*(.*?)\s*```',
+]
+
+WORDS = "calculator button display layout function state input result edge case theme grid".split()
+
+
+def regex_cascade(text: str):
+    """The pre-tokenizer extraction path: streaming check, then history fallback."""
+    lowered = text.lower()
+    has_html = any([
+        "```html" in lowered,
+        "<!doctype html" in lowered,
+        "<html" in lowered and "lang=" in lowered,
+        "<script>" in lowered and "<style>" in lowered,
+        "<head>" in lowered and "<body>" in lowered,
+    ])
+    if has_html:
+        for pattern in STREAM_PATTERNS:
+            matches = re.findall(pattern, text, re.DOTALL | re.IGNORECASE)
+            if matches:
+                html_code = max(matches, key=len).strip()
+                if len(html_code) > 200:
+                    return html_code
+                break
+    for pattern in HISTORY_PATTERNS:
+        matches = re.findall(pattern, text, re.DOTALL | re.IGNORECASE)
+        if matches:
+            candidate = max(matches, key=len).strip()
+            if len(candidate) > 200:
+                return candidate
+    return None
+
+
+def generate_prose(size: int, rng: random.Random) -> str:
+    """Discussion bullets with inline `code` spans and no page."""
+    prose = []
+    length = 0
+    while length < size:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(12))
+        prose.append(f"- The `{rng.choice(WORDS)}` should handle the {sentence}.\n")
+        length += len(prose[-1])
+    return "".join(prose)
+
+
+def generate_reply(size: int, rng: random.Random, terminated: bool = True) -> str:
+    """Prose, then a fenced HTML page padded out to about `size` characters."""
+    prose = generate_prose(size // 4, rng)
+    rules, handlers, buttons = [], [], []
+    i = 0
+    while sum(map(len, rules)) + sum(map(len, handlers)) + sum(map(len, buttons)) < size * 3 // 4:
+        rules.append(f"        .btn-{i} {{ grid-area: b{i}; color: #{i % 4096:03x}; }}\n")
+        handlers.append(f"        function press{i}() {{ display.value += '{i % 10}'; }}\n")
+        buttons.append(f'    <button class="btn-{i}" onclick="press{i}()">{i % 10}</button>\n')
+        i += 1
+    page = (
+        '<!DOCTYPE html>\n<html lang="en">\n<head>\n    <meta charset="UTF-8">\n'
+        "    <title>Calculator App</title>\n    <style>\n" + "".join(rules) + "    </style>\n"
+        "</head>\n<body>\n" + "".join(buttons) + "    <script>\n" + "".join(handlers)
+        + "    </script>\n</body>\n"
+    )
+    if terminated:
+        page += "</html>\n```\n\nLet me know if the Product Owner has feedback.\n"
+    return prose + "\nHere is the implementation:\n\n```html\n" + page
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def streamed(text: str, chunk_size: int):
+    extractor = ArtifactExtractor()
+    for i in range(0, len(text), chunk_size):
+        extractor.feed(text[i:i + chunk_size])
+    extractor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--chunk-size", type=int, default=16, help="characters per streamed delta")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'reply':<14}{'chars':>10}{'regex ms':>12}{'extract ms':>12}{'stream ms':>12}{'speedup':>10}")
+    for size in args.sizes:
+        for label in ("complete", "truncated", "discussion"):
+            if label == "discussion":
+                text = generate_prose(size, rng)
+            else:
+                text = generate_reply(size, rng, terminated=label == "complete")
+            if label != "truncated":
+                expected = regex_cascade(text)
+                assert extract_html(text) == expected, "tokenizer and regex cascade disagree"
+            else:
+                assert extract_html(text) is None, "page cut off mid-document taken as complete"
+            regex_s = timed(lambda: regex_cascade(text), args.repeat)
+            extract_s = timed(lambda: extract_html(text), args.repeat)
+            stream_s = timed(lambda: streamed(text, args.chunk_size), args.repeat)
+            print(f"{label:<14}{len(text):>10}{regex_s * 1000:>12.2f}{extract_s * 1000:>12.2f}"
+                  f"{stream_s * 1000:>12.2f}{regex_s / extract_s:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""GeoPlugin against a local fake geocoder: blocking lookups vs the cached, coalesced, rate-limited plugin.
+
+The fake geocoder answers GET /search?q=... like geocode.maps.co: a JSON
+list of matches (empty for unknown places) after --latency seconds, on
+its own thread and event loop so a blocked client loop can't stall it. It
+enforces a quota of --quota requests per second and answers 429 with
+Retry-After past it. The workload is --lookups calls of
+get_latitude_longitude, --concurrency at a time, over a small set of
+places written with varying case, spacing and punctuation, plus a few
+places the geocoder doesn't know.
+
+- blocking: the previous implementation, a synchronous requests.get per
+  call inside the async function (no cache, no timeout)
+- plugin: GeoPlugin, bucket rate set to the quota (no bursts)
+- plugin, warm disk: a fresh GeoPlugin on the SQLite store the previous
+  run filled, as after a restart
+
+Reported: wall time, calls reaching the geocoder, 429s, lookups that
+failed, the worst event loop stall (how late a 10 ms ticker woke up) and
+latency percentiles.
+
+    python benchmarks/geocoding.py
+    python benchmarks/geocoding.py --lookups 1000 --concurrency 100 --quota 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, ROOT)
+
+PLACES = {
+    "paris, france": ("48.8588897", "2.3200410"),
+    "london": ("51.5074456", "-0.1277653"),
+    "new york": ("40.7127281", "-74.0060152"),
+    "tokyo": ("35.6768601", "139.7638947"),
+    "sydney, australia": ("-33.8698439", "151.2082848"),
+    "nairobi": ("-1.2832533", "36.8172449"),
+    "lima, peru": ("-12.0621065", "-77.0365256"),
+    "oslo": ("59.9133301", "10.7389701"),
+}
+UNKNOWN = ["atlantis", "el dorado"]
+
+
+def spellings(place: str) -> list[str]:
+    """Ways a model might write the same place."""
+    return [place, place.title(), f"  {place.upper()} ", place.replace(", ", " ,") + "."]
+
+
+class FakeGeocoder:
+    def __init__(self, latency: float, quota: float):
+        self.latency = latency
+        self.quota = quota
+        self.requests = self.throttled = 0
+        self._window: list[float] = []
+        self._handlers: set[asyncio.Task] = set()
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    def reset(self):
+        self.requests = self.throttled = 0
+
+    def _over_quota(self) -> bool:
+        now = time.monotonic()
+        self._window = [t for t in self._window if now - t < 1.0]
+        if len(self._window) >= self.quota:
+            return True
+        self._window.append(now)
+        return False
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._handlers.add(asyncio.current_task())
+        self._writers.add(writer)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                target = head.split(b" ", 2)[1].decode()
+                self.requests += 1
+                if self._over_quota():
+                    self.throttled += 1
+                    writer.write(b"HTTP/1.1 429 Too Many Requests\r\nRetry-After: 1\r\nContent-Length: 0\r\n\r\n")
+                    await writer.drain()
+                    continue
+                await asyncio.sleep(self.latency)
+                query = parse_qs(urlsplit(target).query).get("q", [""])[0]
+                # Forgiving like a real geocoder, so the blocking baseline's raw spellings resolve too
+                place = PLACES.get(" ".join(query.casefold().replace(" ,", ",").split()).strip(" ."))
+                body = json.dumps([{"lat": place[0], "lon": place[1]}] if place else []).encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s"
+                             % (len(body), body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def start(self) -> str:
+        """Serve on a background thread; returns the base URL."""
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="fake-geocoder", daemon=True).start()
+        self._listener = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self.handle, "127.0.0.1", 0), self._loop).result()
+        return "http://127.0.0.1:%d" % self._listener.sockets[0].getsockname()[1]
+
+    def stop(self):
+        async def close():
+            self._listener.close()
+            handlers = list(self._handlers)
+            for writer in list(self._writers):
+                writer.close()
+            await asyncio.gather(*handlers, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+async def blocking_lookup(base_url: str, location: str) -> str:
+    """The previous GeoPlugin.get_latitude_longitude, pointed at the fake geocoder."""
+    import requests
+
+    response = requests.get(f"{base_url}/search?q={location}")
+    data = response.json()
+    position = data[0]
+    return f"Latitude: {position['lat']}, Longitude: {position['lon']}"
+
+
+async def run(lookup, locations: list[str], concurrency: int) -> tuple[float, list[float], float, list[str], int]:
+    slots = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    results: list[str] = []
+    failures = 0
+    worst_stall = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal worst_stall
+        while running:
+            expected = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            worst_stall = max(worst_stall, time.perf_counter() - expected)
+
+    async def one(location: str):
+        nonlocal failures
+        async with slots:
+            started = time.perf_counter()
+            try:
+                results.append(await lookup(location))
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+
+    tick = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(one(location) for location in locations))
+    elapsed = time.perf_counter() - started
+    running = False
+    await tick
+    return elapsed, latencies, worst_stall, results, failures
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values) or [0.0]
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def main_async(args):
+    from plugins.geo_coding_plugin import GeoPlugin
+
+    geocoder = FakeGeocoder(args.latency, args.quota)
+    base_url = geocoder.start()
+    random.seed(7)
+    names = [spelling for place in list(PLACES) + UNKNOWN for spelling in spellings(place)]
+    locations = [random.choice(names) for _ in range(args.lookups)]
+    store = os.path.join(tempfile.mkdtemp(prefix="geocoding-bench-"), "geocoding.db")
+
+    def plugin() -> GeoPlugin:
+        return GeoPlugin(base_url=base_url, api_key="", rate=args.quota, burst=1, cache_path=store)
+
+    print(f"{args.lookups} lookups of {len(PLACES) + len(UNKNOWN)} places ({len(names)} spellings), "
+          f"{args.concurrency} at a time; geocoder {args.latency * 1000:.0f} ms, quota {args.quota:g}/s")
+    print(f"{'mode':<18}{'wall s':>8}{'calls':>7}{'429s':>6}{'failed':>8}{'stall ms':>10}{'p50 ms':>8}{'p95 ms':>8}")
+    modes = [("plugin", plugin().get_latitude_longitude), ("plugin, warm disk", plugin().get_latitude_longitude)]
+    if not args.skip_blocking:
+        modes.insert(0, ("blocking", lambda location: blocking_lookup(base_url, location)))
+    for label, lookup in modes:
+        geocoder.reset()
+        elapsed, latencies, stall, results, failures = await run(lookup, locations, args.concurrency)
+        print(f"{label:<18}{elapsed:>8.2f}{geocoder.requests:>7}{geocoder.throttled:>6}{failures:>8}{stall * 1000:>10.1f}"
+              f"{percentile(latencies, 0.5) * 1000:>8.1f}{percentile(latencies, 0.95) * 1000:>8.1f}")
+        if label == "plugin":
+            print("  " + "; ".join(sorted(set(results))[:3]) + "; ...")
+    geocoder.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake geocoder seconds per request")
+    parser.add_argument("--quota", type=float, default=10, help="fake geocoder requests per second")
+    parser.add_argument("--skip-blocking", action="store_true", help="skip the previous, blocking implementation")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
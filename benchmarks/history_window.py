@@ -0,0 +1,87 @@
+"""Prompt size per turn: full group chat history vs. history.window_history.
+
+Simulates a long BA -> PO -> SE run where the Software Engineer posts a new
+draft of the page every third turn (the shape of the 30-50 turn runs that
+end on a budget rather than on approval) and reports, per turn, the
+estimated prompt tokens the next agent would be sent:
+
+- full: agent instructions plus the whole history, as AgentGroupChat sends it
+- windowed: the same history reduced by window_history
+
+    python benchmarks/history_window.py --turns 50 --page-size 6000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from semantic_kernel.contents.chat_message_content import ChatMessageContent  # noqa: E402
+from semantic_kernel.contents.utils.author_role import AuthorRole  # noqa: E402
+
+from fake_chat import fake_page  # noqa: E402
+from history import window_history  # noqa: E402
+from telemetry import estimate_tokens  # noqa: E402
+
+SKILLS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "skills")
+AGENTS = (("BusinessAnalyst", "BA"), ("ProductOwner", "PO"), ("SoftwareEngineer", "SE"))
+
+
+def instructions(folder: str) -> str:
+    with open(os.path.join(SKILLS, folder, "system_message.txt"), "r") as f:
+        return f.read()
+
+
+def reply(agent: str, turn: int, page_size: int) -> str:
+    if agent == "SoftwareEngineer":
+        return (f"Revision {turn // 3}: addressed the review comments.\n\n```html\n"
+                f"{fake_page(page_size + turn * 40)}\n```")
+    if agent == "ProductOwner":
+        return (f"Review of revision {turn // 3}: the layout works, but the display overflows on long numbers "
+                "and division by zero should show 'Error'. Please fix both and resubmit.")
+    return ("Clarified requirements: keep the four basic operations, add keyboard support, "
+            "and make the display scroll horizontally for long input. No other changes.")
+
+
+def prompt_tokens(messages: list[ChatMessageContent]) -> int:
+    return sum(estimate_tokens(message.content) for message in messages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=6000, help="characters per HTML draft")
+    parser.add_argument("--keep-messages", type=int, default=6)
+    parser.add_argument("--every", type=int, default=5, help="print every Nth turn")
+    args = parser.parse_args()
+
+    task = ChatMessageContent(role=AuthorRole.USER, content="Build a calculator web app.\n" + "Requirement. " * 150)
+    history = [task]
+    full_total = windowed_total = 0
+    reduce_seconds = 0.0
+    print(f"{'turn':>5}{'agent':>18}{'full tok':>10}{'windowed tok':>14}{'reduce ms':>11}")
+    for turn in range(1, args.turns + 1):
+        agent, folder = AGENTS[(turn - 1) % len(AGENTS)]
+        system = ChatMessageContent(role=AuthorRole.SYSTEM, name=agent, content=instructions(folder))
+        prompt = [system] + history
+
+        started = time.perf_counter()
+        windowed = window_history(prompt, keep_messages=args.keep_messages)
+        elapsed = time.perf_counter() - started
+        reduce_seconds += elapsed
+
+        full, reduced = prompt_tokens(prompt), prompt_tokens(windowed)
+        full_total += full
+        windowed_total += reduced
+        if turn % args.every == 0 or turn == 1:
+            print(f"{turn:>5}{agent:>18}{full:>10}{reduced:>14}{elapsed * 1000:>11.2f}")
+        history.append(ChatMessageContent(role=AuthorRole.ASSISTANT, name=agent,
+                                          content=reply(agent, turn, args.page_size)))
+
+    print(f"\nprompt tokens over {args.turns} turns: full {full_total}, windowed {windowed_total} "
+          f"({windowed_total / full_total:.0%}); reduction cost {reduce_seconds * 1000:.1f} ms total")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Shared HTTP client vs a client per call, against a local OpenAI-compatible stub server.
+
+The stub speaks just enough HTTP/1.1 (keep-alive, chunked SSE) to serve
+streamed chat completions with a simulated time to first token, and can
+throttle: past --capacity concurrent requests it answers 429 with a
+retry-after-ms header, the way Azure OpenAI does. The workload is
+--requests streamed completions, --concurrency at a time, made through the
+openai SDK client the chat service uses, in two configurations:
+
+- per-call: a new AsyncAzureOpenAI (own connection pool, SDK retries) per request
+- shared: one client on http_client.shared_http_client() (pooled, Retry-After aware)
+
+Reported per configuration: wall time, requests per second, latency
+percentiles, TCP connections the server accepted, 429s it sent and failed
+requests. The stub is plain HTTP, so TLS handshakes, which dominate a new
+connection to Azure, are not part of the numbers.
+
+    python benchmarks/http_pool.py
+    python benchmarks/http_pool.py --capacity 8 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, ROOT)
+
+API_VERSION = "2024-10-21"
+
+
+class StubServer:
+    def __init__(self, ttft: float, chunks: int, chunk_delay: float, capacity: int, retry_after_ms: int):
+        self.ttft, self.chunks, self.chunk_delay = ttft, chunks, chunk_delay
+        self.capacity, self.retry_after_ms = capacity, retry_after_ms
+        self.active = 0
+        self.open: dict[asyncio.StreamWriter, asyncio.Task] = {}
+        self.connections = self.requests = self.throttled = 0
+
+    def reset(self):
+        self.connections = self.requests = self.throttled = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self.open[writer] = asyncio.current_task()
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                headers = dict(line.split(": ", 1) for line in head.decode().split("\r\n")[1:] if ": " in line)
+                length = int({k.lower(): v for k, v in headers.items()}.get("content-length", 0))
+                await reader.readexactly(length)
+                self.requests += 1
+                if self.capacity and self.active >= self.capacity:
+                    self.throttled += 1
+                    body = json.dumps({"error": {"code": "429", "message": "Rate limit exceeded"}}).encode()
+                    writer.write(b"HTTP/1.1 429 Too Many Requests\r\nContent-Type: application/json\r\n"
+                                 b"retry-after-ms: %d\r\nContent-Length: %d\r\n\r\n%s"
+                                 % (self.retry_after_ms, len(body), body))
+                    await writer.drain()
+                    continue
+                self.active += 1
+                try:
+                    await self.stream_completion(writer)
+                finally:
+                    self.active -= 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.open.pop(writer, None)
+            writer.close()
+
+    async def close_connections(self):
+        """Drop idle keep-alive connections and wait for their handlers to finish."""
+        handlers = list(self.open.values())
+        for writer in list(self.open):
+            writer.close()
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    async def stream_completion(self, writer: asyncio.StreamWriter):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n")
+        await asyncio.sleep(self.ttft)
+        for i in range(self.chunks + 1):
+            delta = {"content": "token "} if i < self.chunks else {}
+            event = {"id": "stub", "object": "chat.completion.chunk", "created": 0, "model": "stub",
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": None if delta else "stop"}]}
+            data = f"data: {json.dumps(event)}\n\n".encode()
+            writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+            await writer.drain()
+            if self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+        writer.write(b"%x\r\ndata: [DONE]\n\n\r\n0\r\n\r\n" % len(b"data: [DONE]\n\n"))
+        await writer.drain()
+
+
+async def complete(client) -> None:
+    stream = await client.chat.completions.create(
+        model="stub", messages=[{"role": "user", "content": "Build a calculator web app"}], stream=True
+    )
+    async for _ in stream:
+        pass
+
+
+async def run_workload(endpoint: str, shared: bool, requests: int, concurrency: int) -> tuple[float, list, int]:
+    from openai import AsyncAzureOpenAI
+
+    from http_client import shared_http_client
+
+    latencies: list[float] = []
+    failures = 0
+    slots = asyncio.Semaphore(concurrency)
+    shared_client = AsyncAzureOpenAI(azure_endpoint=endpoint, api_key="stub", api_version=API_VERSION,
+                                     http_client=shared_http_client(), max_retries=0) if shared else None
+
+    async def one():
+        nonlocal failures
+        async with slots:
+            started = time.perf_counter()
+            try:
+                if shared_client is not None:
+                    await complete(shared_client)
+                else:
+                    async with AsyncAzureOpenAI(azure_endpoint=endpoint, api_key="stub",
+                                                api_version=API_VERSION) as client:
+                        await complete(client)
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return time.perf_counter() - started, latencies, failures
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values) or [0.0]
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def main_async(args):
+    server = StubServer(args.ttft, args.chunks, args.chunk_delay, args.capacity, args.retry_after_ms)
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    endpoint = "http://127.0.0.1:%d" % listener.sockets[0].getsockname()[1]
+    print(f"stub: ttft {args.ttft}s, {args.chunks} chunks, capacity {args.capacity or 'unlimited'}; "
+          f"{args.requests} requests, {args.concurrency} at a time")
+    print(f"{'client':<10}{'wall s':>8}{'req/s':>8}{'p50 ms':>8}{'p95 ms':>8}{'conns':>7}{'429s':>6}{'failed':>8}")
+    for label, shared in (("per-call", False), ("shared", True)):
+        server.reset()
+        elapsed, latencies, failures = await run_workload(endpoint, shared, args.requests, args.concurrency)
+        print(f"{label:<10}{elapsed:>8.2f}{len(latencies) / elapsed:>8.1f}"
+              f"{percentile(latencies, 0.5) * 1000:>8.1f}{percentile(latencies, 0.95) * 1000:>8.1f}"
+              f"{server.connections:>7}{server.throttled:>6}{failures:>8}")
+    listener.close()
+    await server.close_connections()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--ttft", type=float, default=0.02, help="stub seconds to first token")
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--chunk-delay", type=float, default=0.0)
+    parser.add_argument("--capacity", type=int, default=0, help="concurrent requests before the stub sends 429s")
+    parser.add_argument("--retry-after-ms", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""End-to-end multi_agent.py benchmark on the offline replay backend.
+
+Plays a recorded conversation (default: recordings/calculator.jsonl, a
+BA -> PO -> SE -> PO run that ends on approval) through run_multi_agent
+with CHAT_BACKEND=replay, so no credentials or network are needed, and
+reports:
+
+- orchestration overhead: wall time per run and per turn with zero model
+  latency, i.e. everything that isn't the model (group chat, strategies,
+  history window, metrics, tracing, file write), blocking and streaming
+- extraction cost: time spent in HTML extraction per agent message
+- throughput: runs per second and latency percentiles (submit to finish,
+  queueing included) with simulated model latency, at each concurrency level
+
+    python benchmarks/multi_agent_replay.py --runs-per-slot 4 --concurrency 1 8 32 64
+    python benchmarks/multi_agent_replay.py --recording runs/<run_id>.jsonl --ttft 0.5 --tokens-per-second 80
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import tempfile
+import time
+import webbrowser
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, ROOT)
+
+
+def configure(recording: str, workdir: str):
+    """Point multi_agent at the replay backend and keep its side effects inside `workdir`."""
+    os.environ["CHAT_BACKEND"] = "replay"
+    os.environ["REPLAY_PATH"] = recording
+    os.environ["LLM_CACHE"] = "off"
+    os.environ["GIT_PUBLISH"] = "off"
+    os.environ["RUN_TRACE_DIR"] = os.path.join(workdir, "runs")
+    os.environ["METRICS_PATH"] = os.path.join(workdir, "metrics.prom")
+    webbrowser.open = lambda url: True
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def extract_totals(telemetry) -> tuple[float, int]:
+    series = telemetry.stage_seconds.values.get(("extract",))
+    return (series[-2], series[-1]) if series else (0.0, 0)
+
+
+async def run_batch(multi_agent, runs: int, concurrency: int, stream: bool) -> tuple[float, list[float]]:
+    from orchestrator import GenerationScheduler
+
+    multi_agent.get_runtime().scheduler = GenerationScheduler(max_concurrency=concurrency, per_tenant=concurrency,
+                                                              max_queued=runs)
+    latencies: list[float] = []
+
+    async def one():
+        started = time.perf_counter()
+        if stream:
+            async for _ in multi_agent.stream_multi_agent("Build a calculator web app", tenant="bench"):
+                pass
+        else:
+            await multi_agent.run_multi_agent("Build a calculator web app", tenant="bench")
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(runs)))
+    return time.perf_counter() - started, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recording", default=os.path.join(ROOT, "benchmarks", "recordings", "calculator.jsonl"))
+    parser.add_argument("--runs-per-slot", type=int, default=4,
+                        help="runs per concurrency slot, so every level takes about as long")
+    parser.add_argument("--overhead-runs", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--ttft", type=float, default=0.25, help="simulated seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=400)
+    parser.add_argument("--stream", action="store_true", help="use streaming runs for the throughput section")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="multi-agent-bench-")
+    configure(os.path.abspath(args.recording), workdir)
+    os.chdir(ROOT)  # agent definitions are read relative to the repo root
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        import multi_agent
+        import telemetry
+        runtime = multi_agent.get_runtime()
+    os.chdir(workdir)  # each run writes generated/<run_id>/index.html under the working directory
+    service = runtime.base_service
+    turns = len(service.recording)
+    print(f"recording: {args.recording} ({turns} turns); scratch dir: {workdir}")
+
+    async def measure():
+        with open(os.devnull, "w") as devnull:
+            # Orchestration overhead: the model answers instantly
+            service.first_token_latency, service.tokens_per_second = 0.0, 1e12
+            print(f"\n{'overhead':<12}{'runs':>6}{'ms/run':>10}{'ms/turn':>10}")
+            for label, stream in (("blocking", False), ("streaming", True)):
+                with contextlib.redirect_stdout(devnull):
+                    elapsed, _ = await run_batch(multi_agent, args.overhead_runs, 1, stream)
+                per_run = elapsed / args.overhead_runs
+                print(f"{label:<12}{args.overhead_runs:>6}{per_run * 1000:>10.1f}{per_run / turns * 1000:>10.2f}")
+
+            seconds, count = extract_totals(telemetry)
+            print(f"\nextraction: {count} messages, {seconds / max(count, 1) * 1000:.3f} ms per message")
+
+            # Throughput with simulated model latency
+            service.first_token_latency, service.tokens_per_second = args.ttft, args.tokens_per_second
+            mode = "streaming" if args.stream else "blocking"
+            print(f"\nthroughput ({mode}, ttft {args.ttft}s, {args.tokens_per_second:g} tok/s)")
+            print(f"{'concurrency':>12}{'runs':>6}{'wall s':>9}{'runs/s':>9}{'p50 s':>8}{'p95 s':>8}{'max s':>8}")
+            for concurrency in args.concurrency:
+                runs = args.runs_per_slot * concurrency
+                with contextlib.redirect_stdout(devnull):
+                    elapsed, latencies = await run_batch(multi_agent, runs, concurrency, args.stream)
+                print(f"{concurrency:>12}{runs:>6}{elapsed:>9.2f}{runs / elapsed:>9.2f}"
+                      f"{percentile(latencies, 0.5):>8.2f}{percentile(latencies, 0.95):>8.2f}"
+                      f"{max(latencies):>8.2f}")
+
+    asyncio.run(measure())
+
+
+if __name__ == "__main__":
+    main()
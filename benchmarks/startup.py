@@ -0,0 +1,84 @@
+"""Startup cost of multi_agent.py: import time and time to the first finished request.
+
+Each sample is a fresh interpreter (so nothing is cached in-process) with
+the fake chat backend answering instantly, run in a scratch directory with
+a copy of skills/. Reported per sample, then as the median:
+
+- import: `import multi_agent`
+- first: the first run_multi_agent call after the import
+- second: a second call in the same process (the warm path)
+
+Pass --repo to measure another checkout, e.g. a worktree of an older commit:
+
+    git worktree add /tmp/before HEAD~1
+    python benchmarks/startup.py --repo /tmp/before
+    python benchmarks/startup.py
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+PROBE = """
+import asyncio, contextlib, io, json, time, webbrowser
+webbrowser.open = lambda url: True
+timings = {}
+with contextlib.redirect_stdout(io.StringIO()):
+    started = time.perf_counter()
+    import multi_agent
+    timings["import"] = time.perf_counter() - started
+    for label in ("first", "second"):
+        started = time.perf_counter()
+        asyncio.run(multi_agent.run_multi_agent("Build a calculator web app"))
+        timings[label] = time.perf_counter() - started
+print(json.dumps(timings))
+"""
+
+
+def sample(repo: str, workdir: str) -> dict:
+    env = dict(
+        os.environ,
+        PYTHONPATH=repo,
+        CHAT_BACKEND="fake",
+        FAKE_CHAT_TTFT="0",
+        FAKE_CHAT_TOKENS_PER_SECOND="1e12",
+        LLM_CACHE="off",
+        GIT_PUBLISH="off",
+        RUN_TRACE_DIR=os.path.join(workdir, "runs"),
+        METRICS_PATH=os.path.join(workdir, "metrics.prom"),
+    )
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=workdir, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(result.stderr)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repo", default=ROOT, help="checkout to measure")
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    repo = os.path.abspath(args.repo)
+    workdir = tempfile.mkdtemp(prefix="multi-agent-startup-")
+    shutil.copytree(os.path.join(repo, "skills"), os.path.join(workdir, "skills"))
+    print(f"repo: {repo}")
+    print(f"{'sample':>7}{'import s':>10}{'first s':>10}{'second s':>10}")
+    samples = []
+    for i in range(args.samples):
+        timings = sample(repo, workdir)
+        samples.append(timings)
+        print(f"{i + 1:>7}{timings['import']:>10.3f}{timings['first']:>10.3f}{timings['second']:>10.3f}")
+    medians = {key: statistics.median(s[key] for s in samples) for key in ("import", "first", "second")}
+    print(f"{'median':>7}{medians['import']:>10.3f}{medians['first']:>10.3f}{medians['second']:>10.3f}")
+    print(f"import + first request: {medians['import'] + medians['first']:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""Load test for the Work Items API (workitems/api.py).
+
+Seeds a synthetic backlog, then drives a concurrent mix of CRUD, list and
+type/state requests either in-process through httpx's ASGI transport or
+against a local uvicorn server. Reports p50/p95/p99 latency per operation,
+overall throughput and the RSS of the process serving the API.
+
+    python benchmarks/workitems_api.py --sizes 1000,100000 --mode both
+    python benchmarks/workitems_api.py --save-baseline benchmarks/baseline.json
+    python benchmarks/workitems_api.py --baseline benchmarks/baseline.json
+
+With --baseline the run exits non-zero if any operation's p95 or the total
+throughput regresses by more than --tolerance.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+WORKITEMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "workitems")
+
+TYPES = ["Bug", "Epic", "Feature", "Task", "Test Case", "User Story"]
+STATES = ["New", "Active", "Design", "In Progress", "Resolved", "Closed"]
+ASSIGNEES = ["", "User1", "User2", "User3", "User4"]
+WORDS = ["login", "payment", "vendor", "loyalty", "checkout", "profile", "report",
+         "search", "cart", "invoice", "dashboard", "export", "mobile", "api", "cache"]
+
+# Relative weights of each operation in the request mix
+OPERATION_MIX = {
+    "get": 40,
+    "list_page": 20,
+    "list_filtered": 10,
+    "types": 5,
+    "states": 5,
+    "create": 8,
+    "update": 8,
+    "delete": 4,
+}
+
+
+def seed_backlog(data_dir: str, size: int, rng: random.Random):
+    with open(os.path.join(data_dir, "workitems.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ID", "WorkItemType", "Title", "AssignedTo", "State", "Tags"])
+        for id in range(1, size + 1):
+            writer.writerow([
+                id,
+                rng.choice(TYPES),
+                " ".join(rng.choices(WORDS, k=5)),
+                rng.choice(ASSIGNEES),
+                rng.choice(STATES),
+                "; ".join(rng.sample(WORDS, k=rng.randint(0, 2))),
+            ])
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+    except ImportError:
+        return 0.0
+
+
+async def drive(client: httpx.AsyncClient, size: int, requests: int, concurrency: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    operations = list(OPERATION_MIX)
+    weights = list(OPERATION_MIX.values())
+    latencies: dict[str, list[float]] = {operation: [] for operation in operations}
+    errors = 0
+    next_id = size + 1
+    created: list[int] = []
+    remaining = requests
+
+    async def call(operation: str):
+        nonlocal next_id, errors
+        if operation == "get":
+            request = client.get(f"/workitems/{rng.randint(1, size)}")
+        elif operation == "list_page":
+            request = client.get("/workitems", params={"limit": 100, "cursor": rng.randint(0, size)})
+        elif operation == "list_filtered":
+            request = client.get("/workitems", params={"state": rng.choice(STATES), "type": rng.choice(TYPES), "limit": 100})
+        elif operation == "types":
+            request = client.get("/workitemtypes")
+        elif operation == "states":
+            request = client.get("/workitemstates")
+        elif operation == "create":
+            id, next_id = next_id, next_id + 1
+            request = client.post("/workitems", json={
+                "ID": id, "WorkItemType": rng.choice(TYPES), "Title": " ".join(rng.choices(WORDS, k=5)),
+                "AssignedTo": rng.choice(ASSIGNEES), "State": "New", "Tags": "",
+            })
+        elif operation == "update":
+            request = client.put(f"/workitems/{rng.randint(1, size)}", json={
+                "ID": 0, "WorkItemType": "", "Title": "", "AssignedTo": "", "State": rng.choice(STATES), "Tags": "",
+            })
+        else:
+            if not created:
+                return
+            request = client.delete(f"/workitems/{created.pop()}")
+        started = time.perf_counter()
+        response = await request
+        latencies[operation].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            errors += 1
+        elif operation == "create":
+            created.append(id)
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await call(rng.choices(operations, weights)[0])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    completed = sum(len(samples) for samples in latencies.values())
+    return {
+        "requests": completed,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput": round(completed / elapsed, 1),
+        "operations": {
+            operation: {
+                "count": len(samples),
+                "p50_ms": round(percentile(samples, 0.50), 3),
+                "p95_ms": round(percentile(samples, 0.95), 3),
+                "p99_ms": round(percentile(samples, 0.99), 3),
+            }
+            for operation, samples in latencies.items() if samples
+        },
+    }
+
+
+def run_inprocess(data_dir: str, size: int, args) -> dict:
+    """Import the app in this (fresh) process and drive it through the ASGI transport."""
+    os.environ["WORKITEMS_DATA_DIR"] = data_dir
+    sys.path.insert(0, WORKITEMS_DIR)
+    os.chdir(WORKITEMS_DIR)
+    started = time.perf_counter()
+    import api
+    startup = time.perf_counter() - started
+
+    async def main():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            result = await drive(client, size, args.requests, args.concurrency, args.seed)
+        await api.persistence.close()
+        return result
+
+    result = asyncio.run(main())
+    result["startup_seconds"] = round(startup, 3)
+    result["rss_mb"] = round(rss_mb(os.getpid()), 1)
+    return result
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_pids(pid: int) -> list[int]:
+    """The uvicorn process plus its worker children, if any."""
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [pid] + [int(child) for child in f.read().split()]
+    except OSError:
+        return [pid]
+
+
+def run_uvicorn(data_dir: str, size: int, args) -> dict:
+    port = free_port()
+    env = dict(os.environ, WORKITEMS_DATA_DIR=data_dir)
+    command = [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--log-level", "warning"]
+    if args.workers > 1:
+        env["WORKITEMS_BACKEND"] = "sqlite"
+        command += ["--workers", str(args.workers)]
+    started = time.perf_counter()
+    server = subprocess.Popen(command, cwd=WORKITEMS_DIR, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            try:
+                httpx.get(f"{base_url}/workitemtypes", timeout=1)
+                break
+            except httpx.TransportError:
+                time.sleep(0.05)
+        startup = time.perf_counter() - started
+
+        async def main():
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+                return await drive(client, size, args.requests, args.concurrency, args.seed)
+
+        result = asyncio.run(main())
+        result["startup_seconds"] = round(startup, 3)
+        result["rss_mb"] = round(sum(rss_mb(pid) for pid in server_pids(server.pid)), 1)
+        return result
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return a description of every metric that regressed beyond `tolerance`."""
+    regressions = []
+    for key, run in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        if run["throughput"] < previous["throughput"] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {run['throughput']} < baseline {previous['throughput']}")
+        for operation, stats in run["operations"].items():
+            before = previous["operations"].get(operation)
+            if before and stats["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{key} {operation}: p95 {stats['p95_ms']}ms > baseline {before['p95_ms']}ms")
+    return regressions
+
+
+def print_table(key: str, result: dict):
+    print(f"\n== {key}: {result['requests']} requests in {result['seconds']}s "
+          f"({result['throughput']} req/s), startup {result['startup_seconds']}s, "
+          f"RSS {result['rss_mb']} MB, errors {result['errors']}")
+    print(f"{'operation':<15}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for operation, stats in result["operations"].items():
+        print(f"{operation:<15}{stats['count']:>8}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma separated backlog sizes")
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn", "both"], default="inprocess")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="uvicorn worker processes (uses the shared SQLite backend when > 1)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", help="compare against a saved results file")
+    parser.add_argument("--save-baseline", help="write the results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression, e.g. 0.25 = 25%%")
+    parser.add_argument("--output", help="also write the results JSON here")
+    parser.add_argument("--run-inprocess", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_inprocess:
+        data_dir, size = args.run_inprocess.rsplit(":", 1)
+        print(json.dumps(run_inprocess(data_dir, int(size), args)))
+        return
+
+    modes = ["inprocess", "uvicorn"] if args.mode == "both" else [args.mode]
+    results = {}
+    for size in (int(size) for size in args.sizes.split(",")):
+        for mode in modes:
+            with tempfile.TemporaryDirectory() as data_dir:
+                seed_backlog(data_dir, size, random.Random(args.seed))
+                if mode == "inprocess":
+                    # A fresh interpreter per run keeps module state and RSS independent
+                    output = subprocess.run(
+                        [sys.executable, os.path.abspath(__file__), f"--run-inprocess={data_dir}:{size}",
+                         f"--requests={args.requests}", f"--concurrency={args.concurrency}", f"--seed={args.seed}"],
+                        check=True, capture_output=True, text=True,
+                    ).stdout
+                    result = json.loads(output.strip().splitlines()[-1])
+                else:
+                    result = run_uvicorn(data_dir, size, args)
+            key = f"{mode}/{size}" if mode == "inprocess" or args.workers == 1 else f"{mode}x{args.workers}/{size}"
+            results[key] = result
+            print_table(key, result)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Per-item memory of the Work Items API's in-memory representations.
+
+Seeds a synthetic backlog and uses tracemalloc to measure the retained bytes
+per item for:
+
+- pydantic WorkItemsDTO objects built per row (the original loading path)
+- compact WorkItemRecord objects built by ingest.read_work_items_csv
+- a full WorkItemStore of records, including its secondary indexes
+
+    python benchmarks/workitems_memory.py --size 100000
+"""
+import argparse
+import csv
+import gc
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "workitems"))
+
+from workitems_api import seed_backlog  # noqa: E402
+from ingest import read_work_items_csv  # noqa: E402
+from store import WorkItemStore, WorkItemsDTO  # noqa: E402
+
+
+def measure(build) -> tuple[object, int]:
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained
+
+
+def load_dtos(path: str) -> list[WorkItemsDTO]:
+    with open(path, encoding="utf-8-sig") as f:
+        return [WorkItemsDTO(**{**row, "ID": int(row["ID"])}) for row in csv.DictReader(f)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        seed_backlog(data_dir, args.size, random.Random(args.seed))
+        path = os.path.join(data_dir, "workitems.csv")
+
+        dtos, dto_bytes = measure(lambda: load_dtos(path))
+        del dtos
+        records, record_bytes = measure(lambda: read_work_items_csv(path))
+        del records
+
+        def build_store():
+            store = WorkItemStore()
+            store.load(read_work_items_csv(path))
+            return store
+
+        store, store_bytes = measure(build_store)
+
+    print(f"{'representation':<28}{'bytes/item':>12}")
+    print(f"{'WorkItemsDTO (per-row)':<28}{dto_bytes / args.size:>12.0f}")
+    print(f"{'WorkItemRecord':<28}{record_bytes / args.size:>12.0f}")
+    print(f"{'WorkItemStore + indexes':<28}{store_bytes / len(store):>12.0f}")
+    print(f"\nrecords use {dto_bytes / record_bytes:.1f}x less memory than DTOs")
+
+
+if __name__ == "__main__":
+    main()
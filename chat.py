@@ -1,34 +1,153 @@
+import asyncio
 import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, AsyncIterator
+
 from dotenv import load_dotenv
-from semantic_kernel import Kernel
-from semantic_kernel.contents.chat_history import ChatHistory
+
+from runtime import get_runtime
 #Import Modules
 
+# semantic_kernel is imported where it's used, so importing this module (and app.py) stays cheap
+if TYPE_CHECKING:
+    from semantic_kernel.contents.chat_history import ChatHistory
+
 # Add Logger
 logger = logging.getLogger(__name__)
 
 load_dotenv(override=True)
 
-chat_history = ChatHistory()
+SYSTEM_MESSAGE = os.getenv(
+    "CHAT_SYSTEM_MESSAGE",
+    "You are a helpful assistant for developers attending an AI workshop. Answer clearly and concisely.",
+)
+# Names the system message, so chat turns show up as their own agent in the metrics
+CHAT_AGENT = "Chat"
+
+
+def _brief(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def fit_history(history: "ChatHistory", max_tokens: int, keep_messages: int = 6, brief_chars: int = 200,
+                summary_chars: int = 3000) -> bool:
+    """Shrink `history` in place until it fits in `max_tokens`; returns whether it changed.
+
+    The system message and the latest turns are kept verbatim: up to
+    `keep_messages` of them, fewer if even those exceed the budget (the
+    latest message always stays). Everything older is folded into a
+    summary system message right after the instructions, one brief line
+    per message (at most `brief_chars` each, `summary_chars` in total,
+    oldest lines dropped first), merged with the previous summary.
+    """
+    from semantic_kernel.contents.chat_message_content import ChatMessageContent
+    from semantic_kernel.contents.utils.author_role import AuthorRole
+
+    from telemetry import estimate_tokens
+
+    messages = history.messages
+    if sum(estimate_tokens(message.content) for message in messages) <= max_tokens:
+        return False
+    head = [message for message in messages[:1] if message.role == AuthorRole.SYSTEM]
+    previous = messages[len(head)] if len(messages) > len(head) and messages[len(head)].name == "summary" else None
+    turns = messages[len(head) + (previous is not None):]
+
+    fixed = sum(estimate_tokens(message.content) for message in head) + estimate_tokens(previous and previous.content)
+    keep = min(keep_messages, len(turns))
+    while keep > 1 and fixed + sum(estimate_tokens(message.content) for message in turns[-keep:]) > max_tokens:
+        keep -= 1
+    folded, kept = turns[:len(turns) - keep], turns[len(turns) - keep:]
+    if not folded:
+        return False
+
+    lines = previous.content.splitlines()[1:] if previous is not None else []
+    lines += [f"- {message.role.value}: {_brief(message.content, brief_chars)}" for message in folded if message.content]
+    total = sum(len(line) + 1 for line in lines)
+    while lines and total > summary_chars:
+        total -= len(lines.pop(0)) + 1
+    summary = ChatMessageContent(role=AuthorRole.SYSTEM, name="summary",
+                                 content="\n".join(["Summary of the earlier conversation:"] + lines))
+    history.messages = head + [summary] + kept
+    return True
+
+
+class ChatSessions:
+    """Chat histories per browser session, least recently used evicted past `max_sessions`.
+
+    Each history starts with the system message and is compacted with
+    `fit_history` after every exchange, so neither the prompt nor the
+    memory held per session grows with the length of the conversation.
+    """
+
+    def __init__(self, max_sessions: int = 500, max_tokens: int = 6000, keep_messages: int = 6):
+        self.max_sessions = max_sessions
+        self.max_tokens = max_tokens
+        self.keep_messages = keep_messages
+        self._histories: "OrderedDict[str, ChatHistory]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> "ChatHistory":
+        from semantic_kernel.contents.chat_history import ChatHistory
+        from semantic_kernel.contents.chat_message_content import ChatMessageContent
+        from semantic_kernel.contents.utils.author_role import AuthorRole
+
+        with self._lock:
+            history = self._histories.get(session_id)
+            if history is None:
+                history = self._histories[session_id] = ChatHistory(messages=[
+                    ChatMessageContent(role=AuthorRole.SYSTEM, name=CHAT_AGENT, content=SYSTEM_MESSAGE)
+                ])
+                while len(self._histories) > self.max_sessions:
+                    self._histories.popitem(last=False)
+            self._histories.move_to_end(session_id)
+            return history
+
+    def reset(self, session_id: str):
+        with self._lock:
+            self._histories.pop(session_id, None)
+
+    def fit(self, history: "ChatHistory"):
+        fit_history(history, self.max_tokens, self.keep_messages)
+
+    def __len__(self) -> int:
+        return len(self._histories)
+
+
+sessions = ChatSessions(
+    max_sessions=int(os.getenv("CHAT_MAX_SESSIONS", "500")),
+    max_tokens=int(os.getenv("CHAT_HISTORY_MAX_TOKENS", "6000")),
+    keep_messages=int(os.getenv("CHAT_HISTORY_KEEP_MESSAGES", "6")),
+)
+
 
 def initialize_kernel():
     #Challene 02 - Add Kernel
-    kernel = Kernel()
+    # The process-wide kernel, with the chat completion service already registered
+    kernel = get_runtime().kernel
     #Challenge 02 - Chat Completion Service
-  
+
     #Challenge 05 - Add Text Embedding service for semantic search
     #Challenge 07 - Add DALL-E image generation service
-    chat_completion_service = kernel.get_service(type=ChatCompletionClientBase)
     return kernel
 
 
-async def process_message(user_input):
+async def stream_message(user_input: str, session_id: str = "default") -> AsyncIterator[str]:
+    """Send `user_input` in `session_id`'s conversation, yielding the reply as it streams in."""
+    from semantic_kernel.contents.utils.author_role import AuthorRole
+
+    # Normally built already by the app's warm-up; if not, build it without blocking the event loop
+    runtime = await asyncio.to_thread(get_runtime)
     kernel = initialize_kernel()
+    # Not the kernel's service, which windows and caches for the agents: `sessions` fits these
+    # histories itself, and replies are never shared between sessions
+    chat_completion_service = runtime.chat_page_service
 
     #Challenge 03 and 04 - Services Required
     #Challenge 03 - Create Prompt Execution Settings
-
-
+    settings = chat_completion_service.get_prompt_execution_settings_class()()
 
     # Challenge 03 - Add Time Plugin
     # Placeholder for Time plugin
@@ -46,9 +165,30 @@ async def process_message(user_input):
     # Placeholder for Text To Image plugin
 
     # Start Challenge 02 - Sending a message to the chat completion service by invoking kernel
-
-    #return result
-
-def reset_chat_history():
-    global chat_history
-    chat_history = ChatHistory()
\ No newline at end of file
+    history = sessions.get(session_id)
+    history.add_user_message(user_input)
+    parts: list[str] = []
+    try:
+        async for chunks in chat_completion_service.get_streaming_chat_message_contents(
+            history, settings, kernel=kernel
+        ):
+            for chunk in chunks:
+                if chunk.content:
+                    parts.append(chunk.content)
+                    yield chunk.content
+    except BaseException:
+        # Leave the conversation as it was, so the user can simply send the message again
+        if history.messages and history.messages[-1].role == AuthorRole.USER:
+            history.messages.pop()
+        raise
+    history.add_assistant_message("".join(parts))
+    sessions.fit(history)
+
+
+async def process_message(user_input: str, session_id: str = "default") -> str:
+    """Send `user_input` in `session_id`'s conversation and return the whole reply."""
+    return "".join([delta async for delta in stream_message(user_input, session_id)])
+
+
+def reset_chat_history(session_id: str = "default"):
+    sessions.reset(session_id)
@@ -0,0 +1,191 @@
+import asyncio
+import glob
+import json
+import os
+import random
+import re
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Optional
+
+from pydantic import Field
+
+from semantic_kernel.connectors.ai.chat_completion_client_base import ChatCompletionClientBase
+from semantic_kernel.connectors.ai.completion_usage import CompletionUsage
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.streaming_chat_message_content import StreamingChatMessageContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from strategies import ANALYST, ENGINEER, REVIEWER
+from telemetry import current_run, estimate_tokens
+
+# Characters per streamed chunk; roughly a handful of tokens, like real deltas
+CHUNK_CHARS = 16
+
+
+def fake_page(size: int) -> str:
+    """A working calculator page padded with CSS rules to about `size` characters."""
+    head = ('<!DOCTYPE html>\n<html lang="en">\n<head>\n    <meta charset="UTF-8">\n'
+            "    <title>Calculator App</title>\n    <style>\n"
+            "        .calc { display: grid; grid-template-columns: repeat(4, 1fr); gap: 4px; }\n")
+    tail = ("    </style>\n</head>\n<body>\n    <input id=\"display\" readonly>\n    <div class=\"calc\">\n"
+            + "".join(f'        <button onclick="press(\'{key}\')">{key}</button>\n' for key in "789/456*123-0.=+C")
+            + "    </div>\n    <script>\n        const display = document.getElementById('display');\n"
+            "        function press(key) {\n"
+            "            if (key === 'C') { display.value = ''; return; }\n"
+            "            if (key === '=') { try { display.value = eval(display.value); } catch { display.value = 'Error'; } return; }\n"
+            "            display.value += key;\n        }\n    </script>\n</body>\n</html>")
+    rules, i = [], 0
+    while len(head) + len(tail) + sum(map(len, rules)) < size:
+        rules.append(f"        .key-{i} {{ color: #{(i * 37) % 4096:03x}; }}\n")
+        i += 1
+    return head + "".join(rules) + tail
+
+
+class FakeChatCompletion(ChatCompletionClientBase):
+    """Offline stand-in for the Azure OpenAI chat service.
+
+    Plays the BA -> PO -> SE -> PO workflow deterministically, keyed on the
+    agent whose instructions lead the history, with simulated latency: the
+    first token after `first_token_latency` seconds (plus up to `jitter`),
+    then `tokens_per_second`. Responses carry usage metadata, so token
+    accounting behaves like the real service.
+    """
+
+    first_token_latency: float = 0.5
+    tokens_per_second: float = 200.0
+    jitter: float = 0.0
+    page_size: int = 4000
+    chunk_chars: int = CHUNK_CHARS
+
+    def __init__(self, **kwargs):
+        super().__init__(ai_model_id=kwargs.pop("ai_model_id", "fake-chat"), **kwargs)
+
+    def get_prompt_execution_settings_class(self) -> type[PromptExecutionSettings]:
+        return PromptExecutionSettings
+
+    def _reply(self, chat_history: ChatHistory) -> tuple[str, str]:
+        agent = next((m.name for m in chat_history.messages if m.role == AuthorRole.SYSTEM and m.name), "")
+        spoken = [m for m in chat_history.messages if m.role == AuthorRole.ASSISTANT]
+        has_page = any(m.name == ENGINEER and "<!DOCTYPE html>" in (m.content or "") for m in spoken)
+        if agent == ANALYST:
+            if any(m.name == ANALYST for m in spoken):
+                return agent, "Requirements are settled: basic arithmetic, decimals, clear, keyboard-free grid layout."
+            return agent, ("Requirements: a calculator with +, -, *, / and a clear button in a grid layout.\n"
+                           "Should it support decimal numbers?")
+        if agent == REVIEWER:
+            if has_page:
+                return agent, "All acceptance criteria are met. READY FOR USER APPROVAL"
+            return agent, "Yes, decimals are required. Acceptance: every operation works and errors show 'Error'."
+        if agent == ENGINEER:
+            return agent, f"Here is the implementation:\n\n```html\n{fake_page(self.page_size)}\n```"
+        return agent, "Noted."
+
+    def _usage(self, chat_history: ChatHistory, content: str) -> CompletionUsage:
+        return CompletionUsage(prompt_tokens=sum(estimate_tokens(m.content) for m in chat_history.messages),
+                               completion_tokens=estimate_tokens(content))
+
+    async def _wait_first_token(self):
+        await asyncio.sleep(self.first_token_latency + random.random() * self.jitter)
+
+    async def _inner_get_chat_message_contents(
+        self, chat_history: ChatHistory, settings: PromptExecutionSettings
+    ) -> list[ChatMessageContent]:
+        _, content = self._reply(chat_history)
+        await self._wait_first_token()
+        await asyncio.sleep(estimate_tokens(content) / self.tokens_per_second)
+        return [ChatMessageContent(role=AuthorRole.ASSISTANT, content=content, ai_model_id=self.ai_model_id,
+                                   metadata={"usage": self._usage(chat_history, content)})]
+
+    async def _inner_get_streaming_chat_message_contents(
+        self, chat_history: ChatHistory, settings: PromptExecutionSettings, function_invoke_attempt: int = 0
+    ) -> AsyncGenerator[list[StreamingChatMessageContent], Any]:
+        _, content = self._reply(chat_history)
+        await self._wait_first_token()
+        chunk_seconds = self.chunk_chars / 4 / self.tokens_per_second
+        for start in range(0, len(content), self.chunk_chars):
+            if start:
+                await asyncio.sleep(chunk_seconds)
+            yield [StreamingChatMessageContent(role=AuthorRole.ASSISTANT,
+                                               content=content[start:start + self.chunk_chars],
+                                               choice_index=0, ai_model_id=self.ai_model_id)]
+        yield [StreamingChatMessageContent(role=AuthorRole.ASSISTANT, content="", choice_index=0,
+                                           ai_model_id=self.ai_model_id,
+                                           metadata={"usage": self._usage(chat_history, content)})]
+
+
+@dataclass
+class RecordedTurn:
+    agent: Optional[str]   # None when the recording doesn't say who spoke
+    content: str
+
+
+def load_recording(path: str) -> list[RecordedTurn]:
+    """Read a recorded conversation.
+
+    `path` is either a run trace (`runs/<run_id>.jsonl`, see run_trace.py),
+    whose `turn` events are replayed, or a directory / glob of the legacy
+    `debug_msg_<n>.txt` dumps (`Role: ...` then `Content: ...`), replayed in
+    numeric order.
+    """
+    if path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        return [RecordedTurn(record.get("agent"), record.get("content") or "")
+                for record in records if record.get("event") == "turn"]
+
+    pattern = os.path.join(path, "debug_msg_*.txt") if os.path.isdir(path) else path
+    files = sorted(glob.glob(pattern), key=lambda name: [int(part) if part.isdigit() else part
+                                                         for part in re.split(r"(\d+)", name)])
+    turns = []
+    for name in files:
+        with open(name, "r", encoding="utf-8") as f:
+            text = f.read()
+        _, _, content = text.partition("Content: ")
+        turns.append(RecordedTurn(None, content if content else text))
+    return turns
+
+
+class ReplayChatCompletion(FakeChatCompletion):
+    """Offline backend that plays a recorded conversation back, with the fake service's simulated latency.
+
+    Each agent gets its own recorded replies in order; turns recorded
+    without an agent name are handed out in sequence to whoever asks.
+    Once the recording runs out, agents answer `exhausted_reply`. Positions
+    are tracked per run (the telemetry run context), so concurrent runs
+    each replay the whole recording.
+    """
+
+    recording: list[RecordedTurn]
+    exhausted_reply: str = "Nothing further to add."
+    cursors: Any = Field(default_factory=weakref.WeakKeyDictionary)
+    shared_cursor: dict = Field(default_factory=lambda: {"agents": {}, "sequence": 0})  # calls outside a run
+    lock: Any = Field(default_factory=threading.Lock)
+
+    def _cursor(self) -> dict:
+        run = current_run.get()
+        if run is None:
+            return self.shared_cursor
+        with self.lock:
+            cursor = self.cursors.get(run)
+            if cursor is None:
+                cursor = self.cursors[run] = {"agents": {}, "sequence": 0}
+            return cursor
+
+    def _reply(self, chat_history: ChatHistory) -> tuple[str, str]:
+        agent = next((m.name for m in chat_history.messages if m.role == AuthorRole.SYSTEM and m.name), "")
+        cursor = self._cursor()
+        with self.lock:
+            position = cursor["agents"].get(agent, 0)
+            own = [turn for turn in self.recording if turn.agent == agent]
+            if position < len(own):
+                cursor["agents"][agent] = position + 1
+                return agent, own[position].content
+            unnamed = [turn for turn in self.recording if turn.agent is None]
+            if cursor["sequence"] < len(unnamed):
+                cursor["sequence"] += 1
+                return agent, unnamed[cursor["sequence"] - 1].content
+        return agent, self.exhausted_reply
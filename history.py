@@ -0,0 +1,159 @@
+import os
+from typing import Any, AsyncGenerator
+
+from semantic_kernel.connectors.ai.chat_completion_client_base import ChatCompletionClientBase
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.streaming_chat_message_content import StreamingChatMessageContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from artifacts import Artifact, extract_artifacts
+
+INSTRUCTION_ROLES = (AuthorRole.SYSTEM, AuthorRole.DEVELOPER)
+# Name of the user message the window folds older turns into
+SUMMARY_NAME = "history"
+
+
+def _speaker(message: ChatMessageContent) -> str:
+    return message.name or message.role.value
+
+
+def _replace_spans(text: str, artifacts: list[Artifact], replacement) -> str:
+    parts, position = [], 0
+    for artifact in artifacts:
+        parts.append(text[position:artifact.start])
+        parts.append(replacement(artifact))
+        position = artifact.end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def _brief(text: str, artifacts: list[Artifact], limit: int) -> str:
+    text = _replace_spans(text, artifacts, lambda artifact: f" [{artifact.kind} code] ")
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def window_history(messages: list[ChatMessageContent], keep_messages: int = 6, brief_chars: int = 240,
+                   summary_chars: int = 4000) -> list[ChatMessageContent]:
+    """Bound the prompt built from a group chat history.
+
+    Kept verbatim: the agent's instructions, the first user message (the
+    task), the latest version of every code artifact and the last
+    `keep_messages` messages. Everything older is folded into a single
+    summary message with one brief line per message (code elided, at most
+    `brief_chars` each, `summary_chars` in total, oldest lines dropped
+    first). Code blocks superseded by a later block of the same kind are
+    replaced with a pointer to the message holding the latest version.
+
+    The prompt therefore stays roughly constant in size however long the
+    run gets, instead of resending every draft on every turn.
+    """
+    head = []
+    index = 0
+    while index < len(messages) and messages[index].role in INSTRUCTION_ROLES:
+        head.append(messages[index])
+        index += 1
+    rest = messages[index:]
+    task = next((i for i, message in enumerate(rest) if message.role == AuthorRole.USER), None)
+
+    # Only agent replies hold drafts; user messages may carry format templates that must stay put
+    artifacts = [extract_artifacts([message.content]) if message.role == AuthorRole.ASSISTANT and message.content
+                 else [] for message in rest]
+    latest: dict[str, int] = {}
+    for i, found in enumerate(artifacts):
+        for artifact in found:
+            latest[artifact.kind] = i
+
+    recent = max(0, len(rest) - keep_messages)
+    # Never start the window on a tool result cut off from its call
+    while 0 < recent < len(rest) and rest[recent].role == AuthorRole.TOOL:
+        recent -= 1
+    pinned = {i for i in latest.values() if i < recent}
+    if task is not None:
+        pinned.add(task)
+
+    def trimmed(i: int) -> ChatMessageContent:
+        message = rest[i]
+        superseded = [artifact for artifact in artifacts[i] if latest[artifact.kind] != i]
+        if not superseded:
+            return message
+        content = _replace_spans(
+            message.content, superseded,
+            lambda artifact: f"[earlier {artifact.kind} draft omitted; superseded by the latest version "
+                             f"from {_speaker(rest[latest[artifact.kind]])}]",
+        )
+        return ChatMessageContent(role=message.role, name=message.name, content=content)
+
+    summarized = [i for i in range(recent) if i not in pinned and rest[i].content]
+    lines = [f"- {_speaker(rest[i])}: {_brief(rest[i].content, artifacts[i], brief_chars)}" for i in summarized]
+    total = sum(len(line) + 1 for line in lines)
+    dropped = 0
+    while dropped < len(lines) and total > summary_chars:
+        total -= len(lines[dropped]) + 1
+        dropped += 1
+
+    reduced = list(head)
+    if task is not None:
+        reduced.append(rest[task])
+    if summarized:
+        header = f"Summary of the earlier discussion ({len(summarized)} messages"
+        header += f", {dropped} oldest not shown):" if dropped else "):"
+        reduced.append(ChatMessageContent(role=AuthorRole.USER, name=SUMMARY_NAME,
+                                          content="\n".join([header] + lines[dropped:])))
+    reduced.extend(trimmed(i) for i in sorted(pinned) if i != task)
+    reduced.extend(trimmed(i) for i in range(recent, len(rest)) if i != task)
+    return reduced
+
+
+class WindowedChatCompletion(ChatCompletionClientBase):
+    """Chat completion service wrapper that sends each agent a windowed view of the history.
+
+    The group chat keeps the full history (strategies and traces still see
+    every message); only the prompt handed to `inner_service` is reduced
+    with `window_history`.
+    """
+
+    inner_service: ChatCompletionClientBase
+    keep_messages: int = 6
+    brief_chars: int = 240
+    summary_chars: int = 4000
+
+    def __init__(self, inner_service: ChatCompletionClientBase, **kwargs):
+        super().__init__(ai_model_id=inner_service.ai_model_id, service_id=inner_service.service_id,
+                         inner_service=inner_service, **kwargs)
+
+    def get_prompt_execution_settings_class(self) -> type[PromptExecutionSettings]:
+        return self.inner_service.get_prompt_execution_settings_class()
+
+    def reduce(self, chat_history: ChatHistory) -> ChatHistory:
+        return ChatHistory(messages=window_history(chat_history.messages, self.keep_messages, self.brief_chars,
+                                                   self.summary_chars))
+
+    async def get_chat_message_contents(self, chat_history: ChatHistory, settings: PromptExecutionSettings,
+                                        **kwargs: Any) -> list[ChatMessageContent]:
+        return await self.inner_service.get_chat_message_contents(self.reduce(chat_history), settings, **kwargs)
+
+    async def get_streaming_chat_message_contents(
+        self, chat_history: ChatHistory, settings: PromptExecutionSettings, **kwargs: Any
+    ) -> AsyncGenerator[list[StreamingChatMessageContent], Any]:
+        async for chunks in self.inner_service.get_streaming_chat_message_contents(
+            self.reduce(chat_history), settings, **kwargs
+        ):
+            yield chunks
+
+
+def windowed_chat_service(service: ChatCompletionClientBase) -> ChatCompletionClientBase:
+    """Wrap `service` with the history window configured by HISTORY_WINDOW_* env vars.
+
+    Set HISTORY_WINDOW=off to send the full history every turn.
+    """
+    if os.getenv("HISTORY_WINDOW", "on").lower() in ("0", "off", "false", "no"):
+        return service
+    return WindowedChatCompletion(
+        service,
+        keep_messages=int(os.getenv("HISTORY_WINDOW_MESSAGES", "6")),
+        brief_chars=int(os.getenv("HISTORY_WINDOW_BRIEF_CHARS", "240")),
+        summary_chars=int(os.getenv("HISTORY_WINDOW_SUMMARY_CHARS", "4000")),
+    )
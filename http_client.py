@@ -0,0 +1,178 @@
+import asyncio
+import importlib.util
+import os
+import random
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Callable, Optional
+
+import httpx
+
+from telemetry import http_retries_total, http_slot_wait_seconds
+
+# Throttling and transient gateway errors; anything else goes straight back to the caller
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+def retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds the server asked us to wait, from retry-after-ms (Azure OpenAI) or Retry-After."""
+    if (value := response.headers.get("retry-after-ms")) is not None:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    if (value := response.headers.get("retry-after")) is not None:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return None
+
+
+class _SlotReleasingStream(httpx.AsyncByteStream):
+    """A response body that gives its concurrency slot back once it is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            release, self._release = self._release, None
+            if release is not None:
+                release()
+
+
+class ThrottledTransport(httpx.AsyncBaseTransport):
+    """Connection-pooled transport with a cap on in-flight requests and Retry-After aware retries.
+
+    A request holds one of `max_concurrency` slots from send until its
+    response body is closed, so streamed completions count for as long as
+    they stream. Throttled (429) and transient (502-504) responses are
+    retried up to `max_attempts` times in total, waiting as long as the
+    server's Retry-After asks (capped at `max_wait`) or, without one, an
+    exponential backoff with full jitter. A request gives up its slot while
+    it waits, so a throttled deployment doesn't also starve the pool.
+
+    Connections and locks belong to the event loop that made them, so the
+    pool and the slots are kept per loop: one set in the long-lived job
+    runner loop, one per asyncio.run on the command line.
+    """
+
+    def __init__(self, make_transport: Callable[[], httpx.AsyncBaseTransport], max_concurrency: int = 32,
+                 max_attempts: int = 4, backoff: float = 0.5, max_wait: float = 60.0):
+        self.make_transport = make_transport
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.max_wait = max_wait
+        self._per_loop: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    async def _loop_state(self) -> tuple[httpx.AsyncBaseTransport, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._per_loop.get(loop)
+        if state is None:
+            # Building a transport loads the CA bundle, which takes ~100 ms; keep that off the event loop
+            transport = await asyncio.to_thread(self.make_transport)
+            with self._lock:
+                state = self._per_loop.setdefault(loop, (transport, asyncio.Semaphore(self.max_concurrency)))
+            if state[0] is not transport:
+                await transport.aclose()
+        return state
+
+    def _delay(self, response: httpx.Response, attempt: int) -> float:
+        requested = retry_after(response)
+        if requested is not None:
+            # A little jitter so requests throttled together don't all come back together
+            return min(self.max_wait, requested) * random.uniform(1.0, 1.1)
+        return random.uniform(0, min(self.max_wait, self.backoff * 2 ** attempt))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        transport, slots = await self._loop_state()
+        attempt = 0
+        while True:
+            waited = time.perf_counter()
+            await slots.acquire()
+            http_slot_wait_seconds.observe(time.perf_counter() - waited)
+            try:
+                response = await transport.handle_async_request(request)
+            except BaseException:
+                slots.release()
+                raise
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_attempts - 1:
+                return httpx.Response(
+                    status_code=response.status_code,
+                    headers=response.headers,
+                    stream=_SlotReleasingStream(response.stream, slots.release),
+                    extensions=response.extensions,
+                )
+            # The error body is small; drain it so the connection goes back to the pool
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+                slots.release()
+            http_retries_total.inc(status=str(response.status_code))
+            await asyncio.sleep(self._delay(response, attempt))
+            attempt += 1
+
+    async def aclose(self):
+        """Close the pool that belongs to the running loop; the others go with their loops."""
+        with self._lock:
+            state = self._per_loop.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state[0].aclose()
+
+
+_shared_client: Optional[httpx.AsyncClient] = None
+_shared_client_lock = threading.Lock()
+
+
+def shared_http_client() -> httpx.AsyncClient:
+    """The process-wide HTTP client for outbound calls (model, geocoding), configured by HTTP_* env vars.
+
+    Keep-alive connections are reused across runs and sessions, with HTTP/2
+    when the h2 package is installed (HTTP_CLIENT_HTTP2=off to disable).
+    """
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            http2 = (os.getenv("HTTP_CLIENT_HTTP2", "on").lower() not in ("0", "off", "false", "no")
+                     and importlib.util.find_spec("h2") is not None)
+            limits = httpx.Limits(
+                max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "32")),
+                max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "16")),
+                keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60")),
+            )
+            transport = ThrottledTransport(
+                # retries= only covers failed connection attempts, which are always safe to repeat
+                lambda: httpx.AsyncHTTPTransport(http2=http2, limits=limits, retries=1),
+                max_concurrency=int(os.getenv("HTTP_MAX_CONCURRENCY", "32")),
+                max_attempts=int(os.getenv("HTTP_MAX_ATTEMPTS", "4")),
+                backoff=float(os.getenv("HTTP_RETRY_BACKOFF", "0.5")),
+                max_wait=float(os.getenv("HTTP_RETRY_MAX_WAIT", "60")),
+            )
+            _shared_client = httpx.AsyncClient(
+                transport=transport,
+                # Generous read timeout: it bounds the gap between streamed chunks, not the whole reply
+                timeout=httpx.Timeout(
+                    connect=float(os.getenv("HTTP_CONNECT_TIMEOUT", "10")),
+                    read=float(os.getenv("HTTP_READ_TIMEOUT", "120")),
+                    write=30.0,
+                    pool=float(os.getenv("HTTP_POOL_TIMEOUT", "60")),
+                ),
+            )
+        return _shared_client
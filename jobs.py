@@ -0,0 +1,188 @@
+import asyncio
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import AsyncIterator, Callable, Iterator, Optional, TypeVar
+
+from orchestrator import AgentDelta, SchedulerFull
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+T = TypeVar("T")
+
+
+@dataclass
+class Reply:
+    agent: str
+    turn: int
+    parts: list[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+@dataclass
+class Job:
+    id: str
+    tenant: str
+    prompt: str
+    status: str = QUEUED
+    replies: list[Reply] = field(default_factory=list)
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+
+class JobRunner:
+    """Runs multi-agent jobs on a persistent event loop in a background thread.
+
+    `submit` returns a job id at once. The caller (a Streamlit script run,
+    which may be rerun or abandoned at any time) keeps only the id and polls
+    `get` for a snapshot with the replies streamed so far. Jobs outlive the
+    page that started them, and all of them share one loop, so the
+    scheduler's concurrency limits hold across every user.
+
+    `run_stream(prompt, tenant)` must return an async iterator of
+    AgentDelta. The last `max_finished` finished jobs are kept for polling.
+    """
+
+    def __init__(self, run_stream: Callable[[str, str], AsyncIterator[AgentDelta]], max_finished: int = 200):
+        self.run_stream = run_stream
+        self.max_finished = max_finished
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._tasks: dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._start_lock = threading.Lock()
+
+    # --- Public API
+
+    def submit(self, prompt: str, tenant: str = "default") -> str:
+        self._ensure_started()
+        job = Job(id=uuid.uuid4().hex, tenant=tenant, prompt=prompt)
+        with self._lock:
+            self._jobs[job.id] = job
+            future = self._tasks[job.id] = asyncio.run_coroutine_threadsafe(self._run(job), self._loop)
+        # Covers jobs cancelled before their coroutine ever started
+        future.add_done_callback(lambda f: f.cancelled() and self._finish(job, CANCELLED))
+        return job.id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """A consistent copy of the job, or None if it is unknown or was evicted."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return replace(job, replies=[Reply(reply.agent, reply.turn, [reply.text]) for reply in job.replies])
+
+    def iterate(self, stream: AsyncIterator[T]) -> Iterator[T]:
+        """Consume `stream` on the runner's loop, yielding its items to a synchronous caller as they arrive.
+
+        For short interactive calls that the caller waits on, such as a chat
+        reply: they share the loop (and its HTTP connections) with the jobs
+        instead of starting a new loop each time. Closing the iterator early
+        cancels the stream.
+        """
+        self._ensure_started()
+        items: queue.Queue = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for item in stream:
+                    items.put((True, item))
+            except BaseException as e:
+                items.put((False, e))
+                raise
+            items.put((True, done))
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        try:
+            while True:
+                ok, item = items.get()
+                if not ok:
+                    raise item
+                if item is done:
+                    return
+                yield item
+        finally:
+            future.cancel()
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock:
+            future = self._tasks.get(job_id)
+        return future.cancel() if future is not None else False
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {status: statuses.count(status) for status in (QUEUED, RUNNING) + FINISHED}
+
+    def close(self, timeout: Optional[float] = None):
+        """Cancel whatever is still running and stop the loop thread."""
+        if self._thread is None:
+            return
+        with self._lock:
+            futures = list(self._tasks.values())
+        for future in futures:
+            future.cancel()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
+
+    # --- Background loop
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._started.clear()
+            self._thread = threading.Thread(target=self._run_loop, name="job-runner", daemon=True)
+            self._thread.start()
+            self._started.wait()
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    async def _run(self, job: Job):
+        try:
+            async for delta in self.run_stream(job.prompt, job.tenant):
+                with self._lock:
+                    if job.status == QUEUED:
+                        # The first delta means the scheduler let the job through
+                        job.status, job.started = RUNNING, time.time()
+                    if not job.replies or (job.replies[-1].agent, job.replies[-1].turn) != (delta.agent, delta.turn):
+                        job.replies.append(Reply(delta.agent, delta.turn))
+                    job.replies[-1].parts.append(delta.text)
+            self._finish(job, DONE)
+        except asyncio.CancelledError:
+            self._finish(job, CANCELLED)
+            raise
+        except SchedulerFull as e:
+            self._finish(job, FAILED, f"Too many requests are waiting; try again shortly ({e})")
+        except Exception as e:
+            self._finish(job, FAILED, str(e))
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None):
+        with self._lock:
+            if job.status in FINISHED:
+                return
+            job.status, job.error, job.finished = status, error, time.time()
+            self._tasks.pop(job.id, None)
+            finished = [job_id for job_id, other in self._jobs.items() if other.status in FINISHED]
+            for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[job_id]
@@ -0,0 +1,254 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncGenerator, Optional
+
+from semantic_kernel.connectors.ai.chat_completion_client_base import ChatCompletionClientBase
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.streaming_chat_message_content import StreamingChatMessageContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from history import SUMMARY_NAME
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    shape TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS responses_shape ON responses (shape);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+"""
+
+# Metadata key for the text a user message was built around, e.g. the task inside a prompt template
+TASK_METADATA = "task"
+
+# Settings that don't change what the model says
+IGNORED_SETTINGS = {"service_id", "function_choice_behavior", "extension_data", "stream", "user"}
+
+_whitespace = re.compile(r"\s+")
+_word = re.compile(r"\w+")
+
+
+def normalize(text: Optional[str]) -> str:
+    return _whitespace.sub(" ", text or "").strip()
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def similarity(a: str, b: str) -> float:
+    """Jaccard similarity of the lower-cased word sets of two prompts."""
+    words_a, words_b = set(_word.findall(a.lower())), set(_word.findall(b.lower()))
+    if not words_a and not words_b:
+        return 1.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+class ChatResponseCache:
+    """Disk-backed cache of chat completions with TTL and LRU eviction.
+
+    Each entry is keyed on the model, the request settings and the whole
+    chat history (agent instructions arrive as its system message), with
+    whitespace normalized. Entries expire `ttl` seconds after they were
+    written, and once more than `max_entries` are stored the least recently
+    used are dropped.
+
+    With a `similarity_threshold` above 0, a miss falls back to entries whose
+    history matches in everything but the user's own text ("shape") and
+    whose user text is at least that similar, so near-duplicate prompts can
+    reuse a previous run's turns. Only what the user typed is compared: a
+    message's `TASK_METADATA` entry stands in for a templated prompt, and
+    the history window's summary belongs to the shape, so shared
+    boilerplate can't make different tasks look alike.
+    """
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600, max_entries: int = 5000,
+                 similarity_threshold: float = 0.0):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    @staticmethod
+    def keys(model: str, chat_history: ChatHistory, settings: PromptExecutionSettings) -> tuple[str, str, str]:
+        """Return (key, shape, prompt) for a request."""
+        settings_data = settings.model_dump(exclude=IGNORED_SETTINGS, exclude_none=True)
+        messages = [(message.role.value, message.name or "", normalize(message.content))
+                    for message in chat_history.messages]
+        typed = [message.role == AuthorRole.USER and message.name != SUMMARY_NAME for message in chat_history.messages]
+        prompt = " ".join(normalize((message.metadata or {}).get(TASK_METADATA, message.content))
+                          for message, is_typed in zip(chat_history.messages, typed) if is_typed)
+        shape = [(role, name, "" if is_typed else content) for (role, name, content), is_typed in zip(messages, typed)]
+        return _digest([model, settings_data, messages]), _digest([model, settings_data, shape]), prompt
+
+    def get(self, key: str, shape: str, prompt: str) -> Optional[list[dict]]:
+        now = time.time()
+        with self._lock:
+            conn = self._conn
+            conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            row = conn.execute("SELECT key, response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None and self.similarity_threshold > 0:
+                best, best_score = None, self.similarity_threshold
+                for candidate_key, candidate_prompt, response in conn.execute(
+                    "SELECT key, prompt, response FROM responses WHERE shape = ?", (shape,)
+                ):
+                    score = similarity(prompt, candidate_prompt)
+                    if score >= best_score:
+                        best, best_score = (candidate_key, response), score
+                if best is not None:
+                    row = best
+                    self.similar_hits += 1
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            conn.execute("UPDATE responses SET accessed = ?, hits = hits + 1 WHERE key = ?", (now, row[0]))
+            return json.loads(row[1])
+
+    def put(self, key: str, shape: str, prompt: str, response: list[dict]):
+        now = time.time()
+        with self._lock:
+            conn = self._conn
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, shape, prompt, response, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, shape, prompt, json.dumps(response), now, now),
+            )
+            conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "lookups": lookups,
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (f"{stats['hits']}/{stats['lookups']} hits ({stats['hit_rate']:.0%}, "
+                f"{stats['similar_hits']} similar), {stats['entries']} entries")
+
+    def close(self):
+        self._conn.close()
+
+
+class CachedChatCompletion(ChatCompletionClientBase):
+    """Chat completion service that answers repeated requests from a ChatResponseCache.
+
+    Wraps another chat completion service and registers under its service
+    id, so agents pick it up without changes. Misses are forwarded to the
+    wrapped service and stored; streamed misses are accumulated and stored
+    once complete, and hits are replayed as a single chunk. Responses that
+    contain function calls are never cached.
+    """
+
+    inner_service: ChatCompletionClientBase
+    cache: Any
+
+    def __init__(self, inner_service: ChatCompletionClientBase, cache: ChatResponseCache):
+        super().__init__(
+            ai_model_id=inner_service.ai_model_id,
+            service_id=inner_service.service_id,
+            inner_service=inner_service,
+            cache=cache,
+        )
+
+    def get_prompt_execution_settings_class(self) -> type[PromptExecutionSettings]:
+        return self.inner_service.get_prompt_execution_settings_class()
+
+    @staticmethod
+    def _serialize(messages) -> Optional[list[dict]]:
+        if any(not isinstance(message.content, str) or not message.content
+               or len(message.items) > 1 for message in messages):
+            return None
+        return [{"role": message.role.value, "content": message.content} for message in messages]
+
+    def _keys(self, chat_history: ChatHistory, settings: PromptExecutionSettings):
+        return self.cache.keys(self.ai_model_id, chat_history, settings)
+
+    async def get_chat_message_contents(self, chat_history: ChatHistory, settings: PromptExecutionSettings,
+                                        **kwargs: Any) -> list[ChatMessageContent]:
+        key, shape, prompt = self._keys(chat_history, settings)
+        cached = await asyncio.to_thread(self.cache.get, key, shape, prompt)
+        if cached is not None:
+            return [
+                ChatMessageContent(role=AuthorRole(entry["role"]), content=entry["content"],
+                                   ai_model_id=self.ai_model_id, metadata={"cache": "hit"})
+                for entry in cached
+            ]
+        responses = await self.inner_service.get_chat_message_contents(chat_history, settings, **kwargs)
+        serialized = self._serialize(responses)
+        if serialized:
+            await asyncio.to_thread(self.cache.put, key, shape, prompt, serialized)
+        return responses
+
+    async def get_streaming_chat_message_contents(
+        self, chat_history: ChatHistory, settings: PromptExecutionSettings, **kwargs: Any
+    ) -> AsyncGenerator[list[StreamingChatMessageContent], Any]:
+        key, shape, prompt = self._keys(chat_history, settings)
+        cached = await asyncio.to_thread(self.cache.get, key, shape, prompt)
+        if cached is not None:
+            yield [
+                StreamingChatMessageContent(role=AuthorRole(entry["role"]), content=entry["content"],
+                                            choice_index=index, ai_model_id=self.ai_model_id,
+                                            metadata={"cache": "hit"})
+                for index, entry in enumerate(cached)
+            ]
+            return
+
+        full: dict[int, StreamingChatMessageContent] = {}
+        async for chunks in self.inner_service.get_streaming_chat_message_contents(chat_history, settings, **kwargs):
+            for chunk in chunks:
+                full[chunk.choice_index] = full[chunk.choice_index] + chunk if chunk.choice_index in full else chunk
+            yield chunks
+        serialized = self._serialize([full[index] for index in sorted(full)]) if full else None
+        if serialized:
+            await asyncio.to_thread(self.cache.put, key, shape, prompt, serialized)
+
+
+def cached_chat_service(service: ChatCompletionClientBase) -> ChatCompletionClientBase:
+    """Wrap `service` with the on-disk response cache configured by LLM_CACHE_* env vars.
+
+    Set LLM_CACHE=off to use the service directly.
+    """
+    if os.getenv("LLM_CACHE", "on").lower() in ("0", "off", "false", "no"):
+        return service
+    cache = ChatResponseCache(
+        path=os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_responses.db")),
+        ttl=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")),
+        similarity_threshold=float(os.getenv("LLM_CACHE_SIMILARITY", "0")),
+    )
+    return CachedChatCompletion(service, cache)
@@ -0,0 +1,181 @@
+import asyncio
+import weakref
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Iterable, TypeVar, Union
+
+# semantic_kernel is imported where it's used: the scheduler and definitions are needed
+# long before the first group chat, and importing semantic_kernel takes seconds
+if TYPE_CHECKING:
+    from semantic_kernel.agents import AgentGroupChat
+    from semantic_kernel.contents.chat_message_content import ChatMessageContent
+    from semantic_kernel.kernel import Kernel
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class AgentDefinition:
+    """Immutable description of an agent persona, shared by every session."""
+    name: str
+    description: str
+    instructions: str
+
+    @classmethod
+    def from_file(cls, name: str, description: str, file_path: str) -> "AgentDefinition":
+        with open(file_path, "r") as f:
+            return cls(name=name, description=description, instructions=f.read())
+
+
+def build_group_chat(kernel: "Kernel", definitions: Iterable[AgentDefinition], **kwargs) -> "AgentGroupChat":
+    """Create a fresh group chat (own agents, own history) for one request.
+
+    Agents are cheap wrappers around the shared kernel, so building them per
+    session costs nothing noticeable and keeps sessions fully isolated.
+    """
+    from semantic_kernel.agents import AgentGroupChat, ChatCompletionAgent
+
+    agents = [
+        ChatCompletionAgent(
+            name=definition.name,
+            description=definition.description,
+            kernel=kernel,
+            instructions=definition.instructions,
+        )
+        for definition in definitions
+    ]
+    return AgentGroupChat(agents=agents, **kwargs)
+
+
+@dataclass(frozen=True)
+class AgentDelta:
+    """A piece of an agent's reply as it streams in; `turn` counts replies within the stream."""
+    agent: str
+    text: str
+    turn: int
+
+
+async def stream_group_chat(group_chat: "AgentGroupChat") -> AsyncIterator[Union[AgentDelta, "ChatMessageContent"]]:
+    """Streaming counterpart of `group_chat.invoke()`.
+
+    Yields an AgentDelta for every text chunk as it arrives, then the
+    complete reply (with its usage metadata) once the agent's turn is over,
+    so callers can render tokens and still see whole messages in order.
+
+    AgentGroupChat.invoke_stream never adds the streamed replies to the
+    group history, so selection and termination would not see them; this
+    runs the same loop but commits each reply before asking the strategies.
+    """
+    from semantic_kernel.agents.chat_completion.chat_completion_agent import ChatHistoryAgentThread
+    from semantic_kernel.contents.chat_history import ChatHistory
+    from semantic_kernel.contents.chat_message_content import ChatMessageContent
+    from semantic_kernel.contents.utils.author_role import AuthorRole
+    from semantic_kernel.exceptions import AgentChatException
+
+    if group_chat.is_complete:
+        if not group_chat.termination_strategy.automatic_reset:
+            raise AgentChatException("Chat is already complete")
+        group_chat.is_complete = False
+
+    for turn in range(1, group_chat.termination_strategy.maximum_iterations + 1):
+        agent = await group_chat.selection_strategy.next(group_chat.agents, group_chat.history.messages)
+        thread = ChatHistoryAgentThread(chat_history=ChatHistory(messages=list(group_chat.history.messages)))
+        parts: list[str] = []
+        metadata: dict = {}
+        async for response in agent.invoke_stream(thread=thread):
+            chunk = response.message
+            metadata.update(chunk.metadata or {})
+            if chunk.content:
+                parts.append(chunk.content)
+                yield AgentDelta(agent=agent.name, text=chunk.content, turn=turn)
+
+        message = ChatMessageContent(role=AuthorRole.ASSISTANT, name=agent.name, content="".join(parts),
+                                     metadata=metadata)
+        await group_chat.add_chat_message(message)
+        # Decide before yielding, like invoke(), so callers see the strategy's view of this reply
+        group_chat.is_complete = await group_chat.termination_strategy.should_terminate(
+            agent, group_chat.history.messages
+        )
+        yield message
+        if group_chat.is_complete:
+            break
+
+
+class SchedulerFull(Exception):
+    """Raised when a job is submitted while the wait queue is already full."""
+
+
+class _LoopState:
+    def __init__(self, max_concurrency: int):
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.tenant_slots: dict[str, asyncio.Semaphore] = {}
+        self.tenant_jobs: dict[str, int] = defaultdict(int)
+        self.running = 0
+        self.queued = 0
+
+
+class GenerationScheduler:
+    """Bounded scheduler for concurrent multi-agent generation jobs.
+
+    At most `max_concurrency` jobs run at once across all tenants, and at
+    most `per_tenant` for any one tenant, so a single user submitting many
+    prompts queues behind themselves instead of starving everyone else.
+    Jobs wait first for a tenant slot, then for a global one. Once
+    `max_queued` jobs are waiting, further submissions fail fast with
+    `SchedulerFull`.
+
+    Limits apply per event loop: callers that drive jobs with separate
+    `asyncio.run` calls each get their own set of slots.
+    """
+
+    def __init__(self, max_concurrency: int = 16, per_tenant: int = 2, max_queued: int = 256):
+        self.max_concurrency = max_concurrency
+        self.per_tenant = per_tenant
+        self.max_queued = max_queued
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _LoopState(self.max_concurrency)
+        return state
+
+    def stats(self) -> dict:
+        state = self._state()
+        return {
+            "running": state.running,
+            "queued": state.queued,
+            "tenants": {tenant: jobs for tenant, jobs in state.tenant_jobs.items() if jobs},
+        }
+
+    async def run(self, tenant: str, job: Callable[[], Awaitable[T]]) -> T:
+        """Wait for a slot for `tenant`, then run `job()` and return its result."""
+        state = self._state()
+        if state.queued >= self.max_queued:
+            raise SchedulerFull(f"{state.queued} generation jobs already waiting")
+
+        tenant_slots = state.tenant_slots.get(tenant)
+        if tenant_slots is None:
+            tenant_slots = state.tenant_slots[tenant] = asyncio.Semaphore(self.per_tenant)
+        state.tenant_jobs[tenant] += 1
+        state.queued += 1
+        queued = True
+        try:
+            async with tenant_slots:
+                async with state.slots:
+                    state.queued -= 1
+                    queued = False
+                    state.running += 1
+                    try:
+                        return await job()
+                    finally:
+                        state.running -= 1
+        finally:
+            if queued:
+                state.queued -= 1
+            state.tenant_jobs[tenant] -= 1
+            if not state.tenant_jobs[tenant]:
+                # Forget idle tenants so the table doesn't grow with every user
+                del state.tenant_jobs[tenant]
+                del state.tenant_slots[tenant]
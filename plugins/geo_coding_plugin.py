@@ -1,20 +1,214 @@
-from typing import TypedDict, Annotated, Optional  
-import requests  
-import asyncio  
-from semantic_kernel.functions import kernel_function
+from typing import TypedDict, Annotated, Optional
+import asyncio
+import json
+import logging
 import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import httpx
+from semantic_kernel.functions import kernel_function
 from dotenv import load_dotenv
 
+from http_client import shared_http_client
+
 load_dotenv(override=True)
 
-class GeoPlugin:  
+logger = logging.getLogger(__name__)
+
+# (latitude, longitude) as the provider spells them; None when the location matched nothing
+Coordinates = Optional[tuple[str, str]]
+
+_separators = re.compile(r"\s*,\s*")
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_location(location: str) -> str:
+    """The cache key and query for a location: "  Paris ,France. " and "paris, france" are one lookup."""
+    text = unicodedata.normalize("NFKC", location or "").casefold()
+    text = _separators.sub(", ", _whitespace.sub(" ", text))
+    return text.strip(" .,;")
+
+
+class TokenBucket:
+    """Lets through `rate` acquisitions per second on average, in bursts of up to `capacity`.
+
+    Thread-safe and not tied to an event loop, so one bucket can hold a
+    provider quota across every loop in the process.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Take a token if there is one; otherwise return how long until there will be."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    async def acquire(self):
+        while (wait := self._take()) > 0:
+            await asyncio.sleep(wait)
+
+
+class GeocodeMemoryCache:
+    """In-memory LRU of lookups with a per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, Coordinates]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[bool, Coordinates]:
+        """(True, coordinates) on a hit, (False, None) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] < time.time():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def put(self, key: str, value: Coordinates, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class GeocodeStore:
+    """SQLite-backed lookups with a per-entry expiry, so results survive restarts."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocodes (key TEXT PRIMARY KEY, result TEXT, expires REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> tuple[bool, Coordinates, float]:
+        """(True, coordinates, expiry) on a hit, (False, None, 0) on a miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT result, expires FROM geocodes WHERE key = ? AND expires > ?",
+                                     (key, time.time())).fetchone()
+        if row is None:
+            return False, None, 0.0
+        result = json.loads(row[0]) if row[0] is not None else None
+        return True, tuple(result) if result is not None else None, row[1]
+
+    def put(self, key: str, value: Coordinates, ttl: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO geocodes (key, result, expires) VALUES (?, ?, ?)",
+                               (key, json.dumps(list(value)) if value is not None else None, now + ttl))
+            self._conn.execute("DELETE FROM geocodes WHERE expires <= ?", (now,))
+
+
+class GeoPlugin:
+    """Geocoding for the kernel, with caching, request coalescing and a client-side rate limit.
+
+    Lookups are keyed on the normalized location. They are answered from
+    an in-memory LRU, then from an optional SQLite store (GEOCODING_CACHE_PATH),
+    and only then from the provider at GEOCODING_BASE_URL. Provider calls go
+    through the process-wide pooled HTTP client. Concurrent lookups of the
+    same location share one provider call, and calls are paced by a token
+    bucket matching the provider's quota (GEOCODING_RATE per second, bursts
+    of GEOCODING_BURST). Locations the provider doesn't know are cached
+    too, for a shorter time.
+    """
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, base_url: Optional[str] = None,
+                 api_key: Optional[str] = None, rate: Optional[float] = None, burst: Optional[float] = None,
+                 timeout: Optional[float] = None, cache_size: Optional[int] = None, ttl: Optional[float] = None,
+                 negative_ttl: Optional[float] = None, cache_path: Optional[str] = None):
+        self.client = client
+        self.base_url = (base_url or os.getenv("GEOCODING_BASE_URL", "https://geocode.maps.co")).rstrip("/")
+        self.api_key = api_key if api_key is not None else os.getenv("GEOCODING_API_KEY")
+        self.timeout = timeout if timeout is not None else float(os.getenv("GEOCODING_TIMEOUT", "10"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("GEOCODING_CACHE_TTL", str(30 * 24 * 3600)))
+        self.negative_ttl = (negative_ttl if negative_ttl is not None
+                             else float(os.getenv("GEOCODING_NEGATIVE_TTL", str(24 * 3600))))
+        self.bucket = TokenBucket(
+            rate if rate is not None else float(os.getenv("GEOCODING_RATE", "1")),
+            burst if burst is not None else float(os.getenv("GEOCODING_BURST", "1")),
+        )
+        self.memory = GeocodeMemoryCache(cache_size if cache_size is not None
+                                         else int(os.getenv("GEOCODING_CACHE_SIZE", "1024")))
+        cache_path = cache_path if cache_path is not None else os.getenv("GEOCODING_CACHE_PATH", "")
+        self.store = GeocodeStore(cache_path) if cache_path else None
+        self.requests = 0  # calls that reached the provider
+        self._pending: dict[str, asyncio.Future] = {}
 
     @kernel_function(description="Gets the latitude and longitude for a location.")
-    async def get_latitude_longitude(self, location:Annotated[str, "The name of the location"]):  
+    async def get_latitude_longitude(self, location:Annotated[str, "The name of the location"]):
         print(f"lat/long request location: {location}")
-        url = f"https://geocode.maps.co/search?q={location}&api_key={os.getenv('GEOCODING_API_KEY')}"  
-        response = requests.get(url) 
-        data = response.json() 
-        position = data[0]
-        return f"Latitude: {position['lat']}, Longitude: {position['lon']}"
-    
\ No newline at end of file
+        try:
+            position = await self.lookup(location)
+        except (httpx.HTTPError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Geocoding {location!r} failed: {e}")
+            return f"Could not look up the coordinates of {location} right now."
+        if position is None:
+            return f"No coordinates found for {location}."
+        return f"Latitude: {position[0]}, Longitude: {position[1]}"
+
+    async def lookup(self, location: str) -> Coordinates:
+        key = normalize_location(location)
+        if not key:
+            return None
+        hit, value = self.memory.get(key)
+        if hit:
+            return value
+        loop = asyncio.get_running_loop()
+        pending = self._pending.get(key)
+        if pending is None or pending.get_loop() is not loop:
+            pending = self._pending[key] = loop.create_task(self._resolve(key))
+            pending.add_done_callback(lambda task: self._pending.get(key) is task and self._pending.pop(key))
+        # Shielded, so one caller giving up doesn't cancel the lookup the others are waiting on
+        return await asyncio.shield(pending)
+
+    async def _resolve(self, key: str) -> Coordinates:
+        if self.store is not None:
+            hit, value, expires = await asyncio.to_thread(self.store.get, key)
+            if hit:
+                self.memory.put(key, value, expires - time.time())
+                return value
+        value = await self._fetch(key)
+        ttl = self.ttl if value is not None else self.negative_ttl
+        self.memory.put(key, value, ttl)
+        if self.store is not None:
+            await asyncio.to_thread(self.store.put, key, value, ttl)
+        return value
+
+    async def _fetch(self, key: str) -> Coordinates:
+        await self.bucket.acquire()
+        params = {"q": key}
+        if self.api_key:
+            params["api_key"] = self.api_key
+        self.requests += 1
+        client = self.client or shared_http_client()
+        response = await client.get(f"{self.base_url}/search", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        if not data:
+            return None
+        return str(data[0]["lat"]), str(data[0]["lon"])
@@ -0,0 +1,205 @@
+import asyncio
+import concurrent.futures
+import os
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+
+class GitError(Exception):
+    def __init__(self, args: tuple[str, ...], returncode: int, stderr: str):
+        super().__init__(f"git {' '.join(args)} failed ({returncode}): {stderr.strip()}")
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+@dataclass
+class PublishResult:
+    paths: list[str]
+    commit: Optional[str] = None      # None when there was nothing to commit
+    pushed: bool = False
+    attempts: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class _Request:
+    paths: list[str]
+    message: str
+    future: concurrent.futures.Future = field(default_factory=concurrent.futures.Future)
+
+
+class GitPublisher:
+    """Commits and pushes generated files in the background.
+
+    `publish` queues files and returns immediately with a
+    concurrent.futures.Future for the outcome (await it from async code with
+    `asyncio.wrap_future`). A dedicated thread runs its own event loop and
+    drives git through `asyncio.create_subprocess_exec`, so callers on any
+    loop, or none, are never blocked by a commit or a slow push.
+
+    Requests arriving within `coalesce_delay` seconds of each other go into
+    a single commit and push. Only the queued paths are staged and
+    committed; anything else in the working tree is left alone. Pushes are
+    retried with exponential backoff and jitter up to `max_attempts` times;
+    a failed push leaves the commit in place to go out with the next batch.
+
+    Status changes are passed to `on_status(state, detail)` from the
+    publisher thread.
+    """
+
+    def __init__(self, repo_dir: str, remote: str = "origin", branch: Optional[str] = None,
+                 coalesce_delay: float = 2.0, max_attempts: int = 5, backoff: float = 1.0,
+                 max_backoff: float = 30.0, on_status: Optional[Callable[[str, str], None]] = None):
+        self.repo_dir = repo_dir
+        self.remote = remote
+        self.branch = branch
+        self.coalesce_delay = coalesce_delay
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.on_status = on_status or (lambda state, detail: print(f"📤 Publisher {state}: {detail}"))
+        self.state = "idle"
+        self.last_result: Optional[PublishResult] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._started = threading.Event()
+        self._start_lock = threading.Lock()
+
+    # --- Public API
+
+    def publish(self, paths: list[str], message: str) -> concurrent.futures.Future:
+        """Queue `paths` (relative to the repo or absolute) for the next commit and push."""
+        self._ensure_started()
+        request = _Request([os.path.relpath(os.path.abspath(path), self.repo_dir) for path in paths], message)
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, request)
+        return request.future
+
+    def close(self, timeout: Optional[float] = None):
+        """Publish whatever is queued, then stop the background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = None
+            return
+        asyncio.run_coroutine_threadsafe(self._queue.put(None), self._loop)
+        self._thread.join(timeout)
+        self._thread = None
+
+    # --- Background loop
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._started.clear()
+            self._thread = threading.Thread(target=self._run, name="git-publisher", daemon=True)
+            self._thread.start()
+            self._started.wait()
+
+    def _run(self):
+        # Subprocesses on Windows need the proactor loop, whatever the global policy says
+        self._loop = asyncio.ProactorEventLoop() if sys.platform == "win32" else asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        self._started.set()
+        try:
+            self._loop.run_until_complete(self._worker())
+        finally:
+            self._loop.close()
+
+    def _status(self, state: str, detail: str):
+        self.state = state
+        try:
+            self.on_status(state, detail)
+        except Exception:
+            pass
+
+    async def _worker(self):
+        closing = False
+        while not closing:
+            request = await self._queue.get()
+            if request is None:
+                break
+            batch = [request]
+            # Let artifacts generated close together share one commit
+            deadline = time.monotonic() + self.coalesce_delay
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    break
+                if request is None:
+                    closing = True
+                    break
+                batch.append(request)
+
+            result = await self._publish_batch(batch)
+            self.last_result = result
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_result(result)
+
+    async def _publish_batch(self, batch: list[_Request]) -> PublishResult:
+        paths = sorted({path for request in batch for path in request.paths})
+        result = PublishResult(paths=paths)
+        try:
+            self._status("committing", ", ".join(paths))
+            await self._git("add", "--", *paths)
+            if await self._git("diff", "--staged", "--quiet", "--", *paths, check=False) == 0:
+                self._status("idle", "no changes to commit")
+            else:
+                messages = list(dict.fromkeys(request.message for request in batch))
+                message = messages[0] if len(messages) == 1 else f"{messages[0]} (+{len(messages) - 1} more)"
+                body = "\n".join(f"- {m}" for m in messages) if len(messages) > 1 else ""
+                args = ["commit", "-m", message] + (["-m", body] if body else []) + ["--only", "--", *paths]
+                await self._git(*args)
+                result.commit = (await self._git_output("rev-parse", "--short", "HEAD")).strip()
+                self._status("committed", f"{result.commit} {message}")
+            await self._push(result)
+        except Exception as e:
+            # Also OSError when git can't be started; the worker has to live on for the next batch
+            result.error = str(e)
+            self._status("failed", result.error)
+        return result
+
+    async def _push(self, result: PublishResult):
+        branch = self.branch or (await self._git_output("rev-parse", "--abbrev-ref", "HEAD")).strip()
+        delay = self.backoff
+        for attempt in range(1, self.max_attempts + 1):
+            result.attempts = attempt
+            self._status("pushing", f"{self.remote}/{branch} (attempt {attempt}/{self.max_attempts})")
+            try:
+                await self._git("push", self.remote, f"HEAD:refs/heads/{branch}")
+            except GitError as e:
+                if attempt == self.max_attempts:
+                    raise
+                self._status("retrying", f"{e}; next attempt in {delay:.1f}s")
+                await asyncio.sleep(delay * (0.5 + random.random()))
+                delay = min(delay * 2, self.max_backoff)
+                continue
+            result.pushed = True
+            self._status("pushed", f"{self.remote}/{branch}")
+            return
+
+    async def _exec(self, args: tuple[str, ...]) -> tuple[int, str, str]:
+        process = await asyncio.create_subprocess_exec(
+            "git", *args, cwd=self.repo_dir,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await process.communicate()
+        return process.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+    async def _git(self, *args: str, check: bool = True) -> int:
+        returncode, _, stderr = await self._exec(args)
+        if check and returncode != 0:
+            raise GitError(args, returncode, stderr)
+        return returncode
+
+    async def _git_output(self, *args: str) -> str:
+        returncode, stdout, stderr = await self._exec(args)
+        if returncode != 0:
+            raise GitError(args, returncode, stderr)
+        return stdout
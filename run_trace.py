@@ -0,0 +1,157 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+
+from telemetry import estimate_tokens
+
+
+class TraceWriter:
+    """Background writer for append-only JSONL files.
+
+    `write` serializes a record and hands it to a writer thread, so callers
+    on the event loop never touch the disk. Lines are buffered per file and
+    appended every `flush_interval` seconds, or sooner once `buffer_bytes`
+    are pending. A file that would grow past `max_bytes` is rotated first
+    (`x.jsonl` -> `x.jsonl.1` -> ... up to `backups`).
+    """
+
+    def __init__(self, flush_interval: float = 0.5, buffer_bytes: int = 64 * 1024,
+                 max_bytes: int = 10 * 1024 * 1024, backups: int = 3):
+        self.flush_interval = flush_interval
+        self.buffer_bytes = buffer_bytes
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, path: str, record: dict):
+        self._queue.put((path, json.dumps(record, ensure_ascii=False, default=str) + "\n"))
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until everything written so far is on disk."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        pending: dict[str, list[str]] = {}
+        pending_bytes = 0
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = False
+            if isinstance(item, tuple):
+                path, line = item
+                pending.setdefault(path, []).append(line)
+                pending_bytes += len(line)
+                if pending_bytes < self.buffer_bytes and time.monotonic() < deadline:
+                    continue
+            if pending:
+                self._write_pending(pending)
+                pending, pending_bytes = {}, 0
+            deadline = time.monotonic() + self.flush_interval
+            if item is None:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def _write_pending(self, pending: dict[str, list[str]]):
+        for path, lines in pending.items():
+            data = "".join(lines).encode("utf-8")
+            try:
+                if os.path.dirname(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                size = os.path.getsize(path) if os.path.exists(path) else 0
+                if size and size + len(data) > self.max_bytes:
+                    self._rotate(path)
+                with open(path, "ab") as f:
+                    f.write(data)
+            except OSError as e:
+                print(f"⚠️ Could not write trace {path}: {e}")
+
+    def _rotate(self, path: str):
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{path}.{index}"):
+                os.replace(f"{path}.{index}", f"{path}.{index + 1}")
+        os.replace(path, f"{path}.1")
+
+
+_default_writer: Optional[TraceWriter] = None
+_default_writer_lock = threading.Lock()
+
+
+def default_writer() -> TraceWriter:
+    """Process-wide writer, flushed at interpreter exit."""
+    global _default_writer
+    with _default_writer_lock:
+        if _default_writer is None:
+            _default_writer = TraceWriter(
+                max_bytes=int(os.getenv("RUN_TRACE_MAX_BYTES", str(10 * 1024 * 1024))),
+            )
+            atexit.register(_default_writer.close)
+        return _default_writer
+
+
+def usage_tokens(message: ChatMessageContent) -> tuple[Optional[int], int, bool]:
+    """(prompt_tokens, completion_tokens, estimated) for a response message; prompt tokens are None if unreported."""
+    usage = message.metadata.get("usage") if message.metadata else None
+    if usage is not None:
+        return usage.prompt_tokens or 0, usage.completion_tokens or 0, False
+    return None, estimate_tokens(message.content), True
+
+
+class RunTrace:
+    """Structured trace of one multi-agent run, one JSON object per line in `<directory>/<run_id>.jsonl`.
+
+    Every record carries `ts` (UTC ISO-8601), `run_id`, `event` and
+    `elapsed_ms` since the run started.
+    """
+
+    def __init__(self, directory: str = "runs", run_id: Optional[str] = None,
+                 writer: Optional[TraceWriter] = None):
+        self.run_id = run_id or f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.path = os.path.join(directory, f"{self.run_id}.jsonl")
+        self.writer = writer or default_writer()
+        self.started = time.perf_counter()
+        self.turns = 0
+
+    def event(self, event: str, **fields):
+        self.writer.write(self.path, {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "run_id": self.run_id,
+            "event": event,
+            "elapsed_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            **fields,
+        })
+
+    def turn(self, message: ChatMessageContent, latency: float):
+        """Record one agent message and how long it took to arrive."""
+        self.turns += 1
+        prompt_tokens, completion_tokens, estimated = usage_tokens(message)
+        self.event(
+            "turn",
+            turn=self.turns,
+            agent=message.name,
+            role=message.role.value,
+            latency_ms=round(latency * 1000, 1),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            tokens_estimated=estimated,
+            chars=len(message.content or ""),
+            content=message.content,
+        )
@@ -0,0 +1,163 @@
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from orchestrator import AgentDefinition, GenerationScheduler
+from publisher import GitPublisher
+
+
+@dataclass
+class Runtime:
+    """Everything the multi-agent pipeline shares across requests, built once per process."""
+    kernel: Any                 # semantic_kernel Kernel with `chat_service` registered
+    chat_service: Any           # outermost service wrapper; what the agents call
+    base_service: Any           # the model backend itself (Azure, fake or replay)
+    response_cache: Any         # the LLM response cache wrapper, or base_service when caching is off
+    chat_page_service: Any      # what the chat page calls: instrumented base_service, no window or cache
+    agent_definitions: tuple[AgentDefinition, ...]
+    scheduler: GenerationScheduler
+    publisher: GitPublisher
+    max_turns: int
+    max_tokens: int
+    trace_dir: str
+    metrics_path: str
+    output_dir: str             # generated pages go to <output_dir>/<run_id>/index.html
+
+
+_runtime: Optional[Runtime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> Runtime:
+    """The process-wide runtime, built on first use.
+
+    Building it imports semantic_kernel (several seconds) and reads the
+    .env file, agent skills and configuration, so importing modules that
+    use it stays cheap and the cost is paid once, by the first request or
+    by a warm-up thread.
+    """
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = build_runtime()
+    return _runtime
+
+
+def runtime_built() -> bool:
+    return _runtime is not None
+
+
+def _chat_backend():
+    """The model backend selected by CHAT_BACKEND (azure, fake or replay)."""
+    backend = os.getenv("CHAT_BACKEND", "azure").lower()
+    # Offline backends with simulated latency, for measurements and runs without credentials:
+    # CHAT_BACKEND=fake plays a scripted calculator workflow, CHAT_BACKEND=replay plays the
+    # recording at REPLAY_PATH (a runs/<run_id>.jsonl trace or a folder of debug_msg_*.txt dumps)
+    if backend in ("fake", "replay"):
+        from fake_chat import FakeChatCompletion, ReplayChatCompletion, load_recording
+
+        latency = dict(
+            first_token_latency=float(os.getenv("FAKE_CHAT_TTFT", "0.5")),
+            tokens_per_second=float(os.getenv("FAKE_CHAT_TOKENS_PER_SECOND", "200")),
+            chunk_chars=int(os.getenv("FAKE_CHAT_CHUNK_CHARS", "16")),
+        )
+        if backend == "replay":
+            replay_path = os.getenv("REPLAY_PATH", ".")
+            print(f"Using replay chat service ({replay_path})...")
+            return ReplayChatCompletion(recording=load_recording(replay_path), **latency)
+        print("Using fake chat service...")
+        return FakeChatCompletion(**latency)
+
+    from semantic_kernel.connectors.ai.open_ai.services.azure_chat_completion import AzureChatCompletion
+
+    from http_client import shared_http_client
+
+    # Use OpenAI directly (without Azure)
+    print("Using OpenAI service...")
+    service = AzureChatCompletion(
+        deployment_name=os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT_NAME"),
+        endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+    )
+    # Same client settings, but on the shared connection pool. Retries are left to the pool's
+    # transport, which knows how many requests are in flight; the SDK's own would multiply them.
+    service.client = service.client.with_options(http_client=shared_http_client(), max_retries=0)
+    return service
+
+
+def build_runtime() -> Runtime:
+    from dotenv import load_dotenv
+    from semantic_kernel.kernel import Kernel
+
+    from history import windowed_chat_service
+    from llm_cache import cached_chat_service
+    from telemetry import InstrumentedChatCompletion
+
+    # Load environment variables from .env file
+    load_dotenv()
+
+    base_service = _chat_backend()
+    response_cache = cached_chat_service(base_service)
+    # Outermost, so the cache, metrics and model all see the windowed prompt
+    chat_service = windowed_chat_service(InstrumentedChatCompletion(response_cache))
+    kernel = Kernel()
+    kernel.add_service(chat_service)
+    # The chat page fits its own histories (chat.fit_history), so the agents' window would only
+    # summarize them a second time; and free-form conversations aren't worth replaying from
+    # another session's cached answer, so they go straight to the model
+    chat_page_service = InstrumentedChatCompletion(base_service)
+
+    # Shared, immutable agent definitions; each request builds its own agents from these
+    agent_definitions = (
+        AgentDefinition.from_file(
+            name="BusinessAnalyst",
+            description="Business Analyst persona for gathering and clarifying requirements.",
+            file_path="skills/BA/system_message.txt",
+        ),
+        AgentDefinition.from_file(
+            name="SoftwareEngineer",
+            description="Software Engineer persona to implement requested features and produce HTML/JS code.",
+            file_path="skills/SE/system_message.txt",
+        ),
+        AgentDefinition.from_file(
+            name="ProductOwner",
+            description="Product Owner persona for reviewing and ensuring all requirements are met.",
+            file_path="skills/PO/system_message.txt",
+        ),
+    )
+    print("Agent definitions loaded:")
+    for definition in agent_definitions:
+        print(f"- {definition.name}")
+
+    trace_dir = os.getenv("RUN_TRACE_DIR", "runs")
+    return Runtime(
+        kernel=kernel,
+        chat_service=chat_service,
+        base_service=base_service,
+        response_cache=response_cache,
+        chat_page_service=chat_page_service,
+        agent_definitions=agent_definitions,
+        # Bounds concurrent generation jobs on the shared kernel
+        scheduler=GenerationScheduler(
+            max_concurrency=int(os.getenv("MULTI_AGENT_MAX_CONCURRENCY", "16")),
+            per_tenant=int(os.getenv("MULTI_AGENT_TENANT_CONCURRENCY", "2")),
+            max_queued=int(os.getenv("MULTI_AGENT_MAX_QUEUED", "256")),
+        ),
+        # Commits and pushes generated files off the event loop
+        publisher=GitPublisher(
+            os.getcwd(),
+            remote=os.getenv("GIT_PUBLISH_REMOTE", "origin"),
+            branch=os.getenv("GIT_PUBLISH_BRANCH") or None,
+            coalesce_delay=float(os.getenv("GIT_PUBLISH_DELAY", "2")),
+            max_attempts=int(os.getenv("GIT_PUBLISH_ATTEMPTS", "5")),
+        ),
+        # Per-run budgets; a run also ends as soon as the PO approves a valid page
+        max_turns=int(os.getenv("MULTI_AGENT_MAX_TURNS", "12")),
+        max_tokens=int(os.getenv("MULTI_AGENT_MAX_TOKENS", "200000")),
+        trace_dir=trace_dir,
+        metrics_path=os.getenv("METRICS_PATH", os.path.join(trace_dir, "metrics.prom")),
+        # Not under trace_dir, which is gitignored: these files get published
+        output_dir=os.getenv("OUTPUT_DIR", "generated"),
+    )
@@ -0,0 +1,191 @@
+import re
+from typing import Optional
+
+from semantic_kernel.agents import Agent
+from semantic_kernel.agents.strategies.selection.selection_strategy import SelectionStrategy
+from semantic_kernel.agents.strategies.termination.termination_strategy import TerminationStrategy
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from artifacts import extract_html
+from telemetry import estimate_tokens, span
+
+ANALYST = "BusinessAnalyst"
+ENGINEER = "SoftwareEngineer"
+REVIEWER = "ProductOwner"
+# What a user types to accept the work
+USER_APPROVALS = frozenset({"APPROVED", "APPROVED."})
+
+
+def final_statement(text: str) -> str:
+    """The last sentence of the last non-empty line, upper-cased, without punctuation or extra spaces."""
+    lines = [line for line in (text or "").splitlines() if line.strip()]
+    if not lines:
+        return ""
+    sentences = [sentence for sentence in re.split(r"(?<=[.!?])\s+", lines[-1].strip()) if sentence.strip()]
+    return " ".join(re.sub(r"[^\w\s]", " ", sentences[-1]).upper().split())
+
+
+def has_open_questions(message: ChatMessageContent) -> bool:
+    return any(line.rstrip().endswith("?") for line in (message.content or "").splitlines())
+
+
+def addressed_to(message: ChatMessageContent, agents: list[Agent]) -> Optional[Agent]:
+    """The agent a message opens by addressing, e.g. "Software Engineer: please ..."."""
+    opening = (message.content or "").lstrip().lower()
+    for agent in agents:
+        spoken = re.sub(r"(?<=[a-z])(?=[A-Z])", " ", agent.name).lower()
+        if opening.startswith(agent.name.lower()) or opening.startswith(spoken):
+            return agent
+    return None
+
+
+def last_message_from(history: list[ChatMessageContent], name: str) -> Optional[ChatMessageContent]:
+    for message in reversed(history):
+        if message.role == AuthorRole.ASSISTANT and message.name == name:
+            return message
+    return None
+
+
+class ApprovalTerminationStrategy(TerminationStrategy):
+    """Ends a run once the work is accepted or the run's budget is spent.
+
+    The run is accepted when the reviewer (the Product Owner) closes its
+    reply with one of `approval_phrases`, as a sentence of its own, after a
+    valid HTML artifact exists, or when the user replies APPROVED after the
+    task message. Independently, the run stops after `max_turns` agent
+    turns or once `max_tokens` prompt+completion tokens have been
+    used, counted from usage metadata where the service reports it and
+    estimated otherwise.
+
+    `artifact` holds the latest valid page, and `reason` says why the run
+    stopped. History is scanned incrementally, so each message is looked at
+    once.
+    """
+
+    reviewer: str = REVIEWER
+    approval_phrases: tuple[str, ...] = ("READY FOR USER APPROVAL",)
+    min_artifact_length: int = 200
+    max_turns: int = 12
+    max_tokens: int = 200000
+    # Follow-up invokes on the same chat (e.g. asking the SE for code) must not raise
+    automatic_reset: bool = True
+
+    turns: int = 0
+    tokens: int = 0
+    artifact: Optional[str] = None
+    reason: Optional[str] = None
+    scanned: int = 0
+    context_tokens: int = 0
+
+    def _scan(self, history: list[ChatMessageContent]):
+        context_tokens = self.context_tokens
+        for message in history[self.scanned:]:
+            if message.role == AuthorRole.ASSISTANT:
+                self.turns += 1
+                usage = message.metadata.get("usage") if message.metadata else None
+                if usage is not None:
+                    self.tokens += (usage.prompt_tokens or 0) + (usage.completion_tokens or 0)
+                else:
+                    self.tokens += context_tokens + estimate_tokens(message.content)
+                with span("extract"):
+                    html_code = extract_html(message.content or "", self.min_artifact_length)
+                if html_code:
+                    self.artifact = html_code
+            context_tokens += estimate_tokens(message.content)
+        self.context_tokens = context_tokens
+        self.scanned = len(history)
+
+    def _approved(self, agent: Agent, history: list[ChatMessageContent]) -> bool:
+        # A user's explicit "APPROVED" reply; the first user message is the task itself
+        user_messages = [message for message in history if message.role == AuthorRole.USER]
+        if any((message.content or "").strip().upper() in USER_APPROVALS for message in user_messages[1:]):
+            return True
+        if self.artifact is None or agent.name != self.reviewer:
+            return False
+        # The phrase must be the reply's closing statement on its own, so "NOT READY FOR USER
+        # APPROVAL" or a request for changes after it doesn't end the run
+        return final_statement(history[-1].content) in {final_statement(phrase) for phrase in self.approval_phrases}
+
+    async def should_agent_terminate(self, agent: Agent, history: list[ChatMessageContent]) -> bool:
+        self._scan(history)
+        if self._approved(agent, history):
+            self.reason = "approved"
+        elif self.turns >= self.max_turns:
+            self.reason = f"turn budget ({self.max_turns}) reached"
+        elif self.tokens >= self.max_tokens:
+            self.reason = f"token budget ({self.max_tokens}) reached"
+        else:
+            return False
+        print(f"🛑 Ending run after {self.turns} turns, ~{self.tokens} tokens: {self.reason}")
+        return True
+
+
+class WorkflowSelectionStrategy(SelectionStrategy):
+    """Picks the next agent from where the BA -> SE -> PO workflow stands.
+
+    - A user message goes to the agent it addresses by name; otherwise the
+      Business Analyst opens (or the engineer, when revising a page).
+    - While the analyst still has open questions, the Product Owner answers
+      them, for at most `max_clarifications` rounds; once the requirements
+      are stable the turn goes straight to the Software Engineer.
+    - A page from the engineer goes to the Product Owner for review; review
+      feedback goes back to the engineer.
+    - An engineer turn with questions and no page goes to the analyst.
+    """
+
+    analyst: str = ANALYST
+    engineer: str = ENGINEER
+    reviewer: str = REVIEWER
+    max_clarifications: int = 1
+    min_artifact_length: int = 200
+
+    async def select_agent(self, agents: list[Agent], history: list[ChatMessageContent]) -> Agent:
+        by_name = {agent.name: agent for agent in agents}
+
+        def pick(name: str) -> Agent:
+            return by_name.get(name, agents[0])
+
+        last = history[-1] if history else None
+        if last is None or last.role != AuthorRole.ASSISTANT:
+            # New user input: whoever it addresses, else the engineer if a page is already
+            # under review, else the analyst
+            if last is not None and (agent := addressed_to(last, agents)) is not None:
+                return agent
+            if any(extract_html(m.content or "", self.min_artifact_length)
+                   for m in history if m.role == AuthorRole.ASSISTANT and m.name == self.engineer):
+                return pick(self.engineer)
+            return pick(self.analyst)
+
+        if last.name == self.analyst:
+            if has_open_questions(last) and self._clarifications(history) < self.max_clarifications:
+                return pick(self.reviewer)
+            return pick(self.engineer)
+
+        if last.name == self.reviewer:
+            analyst_message = last_message_from(history, self.analyst)
+            engineer_message = last_message_from(history, self.engineer)
+            if engineer_message is None and analyst_message is not None and has_open_questions(analyst_message) \
+                    and self._clarifications(history) < self.max_clarifications:
+                return pick(self.analyst)
+            return pick(self.engineer)
+
+        if last.name == self.engineer:
+            if extract_html(last.content or "", self.min_artifact_length):
+                return pick(self.reviewer)
+            if has_open_questions(last):
+                return pick(self.analyst)
+            return pick(self.reviewer)
+
+        return pick(self.analyst)
+
+    def _clarifications(self, history: list[ChatMessageContent]) -> int:
+        rounds = 0
+        for message in history:
+            if message.role != AuthorRole.ASSISTANT:
+                continue
+            if message.name == self.engineer:
+                break
+            if message.name == self.reviewer:
+                rounds += 1
+        return rounds
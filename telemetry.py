@@ -0,0 +1,270 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncGenerator, Optional
+
+from semantic_kernel.connectors.ai.chat_completion_client_base import ChatCompletionClientBase
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.streaming_chat_message_content import StreamingChatMessageContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+# Seconds; suits both sub-millisecond stages and multi-minute LLM turns
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Rough token count for messages that carry no usage metadata (about 4 characters per token)."""
+    return len(text or "") // 4 + 1
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_string(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: dict[tuple, float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            values = sorted(self.values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_label_string(self.labels, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.values: dict[tuple, list] = {}  # key -> [count per bucket..., sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        with self.lock:
+            values = sorted((key, list(series)) for key, series in self.values.items())
+        for key, series in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_label_string(names, key + (f'{bound:g}',))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_label_string(names, key + ('+Inf',))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_label_string(self.labels, key)} {series[-2]:g}")
+            lines.append(f"{self.name}_count{_label_string(self.labels, key)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics: dict[str, Any] = {}
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        with self.lock:
+            return self.metrics.setdefault(name, Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        with self.lock:
+            return self.metrics.setdefault(name, Histogram(name, help, labels, buckets))
+
+    def render_prometheus(self) -> str:
+        with self.lock:
+            lines = []
+            for metric in self.metrics.values():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str):
+        """Write the Prometheus text exposition atomically (for node_exporter's textfile collector)."""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+
+registry = MetricsRegistry()
+
+stage_seconds = registry.histogram("pipeline_stage_seconds", "Time spent per pipeline stage.", ("stage",))
+turn_seconds = registry.histogram("agent_turn_seconds", "Chat completion latency per agent turn.", ("agent",))
+ttft_seconds = registry.histogram("agent_ttft_seconds", "Time to first streamed token per agent turn.", ("agent",))
+turns_total = registry.counter("agent_turns_total", "Agent turns completed.", ("agent", "cache"))
+tokens_total = registry.counter("agent_tokens_total", "Tokens sent to and received from the model.",
+                                ("agent", "direction"))
+runs_total = registry.counter("multi_agent_runs_total", "Multi-agent runs by outcome.", ("outcome",))
+http_retries_total = registry.counter("model_http_retries_total", "Model requests retried after a throttling "
+                                      "or transient error response.", ("status",))
+http_slot_wait_seconds = registry.histogram("model_http_slot_wait_seconds",
+                                            "Time model requests waited for a free concurrency slot.")
+
+
+class RunSummary:
+    """Per-run aggregate of stage timings and agent turns, printed as a table at the end of a run."""
+
+    def __init__(self, run_id: str = ""):
+        self.run_id = run_id
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.stages: dict[str, list] = {}   # stage -> [count, total, max]
+        self.agents: dict[str, dict] = {}
+
+    def add_stage(self, stage: str, seconds: float):
+        with self.lock:
+            entry = self.stages.setdefault(stage, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def add_turn(self, agent: str, seconds: float, ttft: Optional[float], tokens_in: int, tokens_out: int,
+                 cached: bool):
+        with self.lock:
+            entry = self.agents.setdefault(agent, {"turns": 0, "seconds": 0.0, "ttft": [], "in": 0, "out": 0,
+                                                   "cached": 0})
+            entry["turns"] += 1
+            entry["seconds"] += seconds
+            entry["in"] += tokens_in
+            entry["out"] += tokens_out
+            entry["cached"] += cached
+            if ttft is not None:
+                entry["ttft"].append(ttft)
+
+    def table(self) -> str:
+        wall = time.perf_counter() - self.started
+        lines = [f"Run {self.run_id} summary ({wall:.2f}s wall)",
+                 f"  {'agent':<20}{'turns':>6}{'cached':>7}{'total s':>9}{'mean s':>8}{'ttft s':>8}"
+                 f"{'tok in':>9}{'tok out':>9}"]
+        with self.lock:
+            for agent, entry in sorted(self.agents.items()):
+                ttft = f"{sum(entry['ttft']) / len(entry['ttft']):.2f}" if entry["ttft"] else "-"
+                lines.append(f"  {agent:<20}{entry['turns']:>6}{entry['cached']:>7}{entry['seconds']:>9.2f}"
+                             f"{entry['seconds'] / entry['turns']:>8.2f}{ttft:>8}{entry['in']:>9}{entry['out']:>9}")
+            lines.append(f"  {'stage':<20}{'count':>6}{'total ms':>16}{'mean ms':>8}{'max ms':>8}")
+            for stage, (count, total, longest) in sorted(self.stages.items()):
+                lines.append(f"  {stage:<20}{count:>6}{total * 1000:>16.1f}{total * 1000 / count:>8.1f}"
+                             f"{longest * 1000:>8.1f}")
+        return "\n".join(lines)
+
+
+current_run: contextvars.ContextVar[Optional[RunSummary]] = contextvars.ContextVar("current_run", default=None)
+
+
+def observe_stage(stage: str, seconds: float, summary: Optional[RunSummary] = None):
+    stage_seconds.observe(seconds, stage=stage)
+    summary = summary or current_run.get()
+    if summary is not None:
+        summary.add_stage(stage, seconds)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block as `stage` in the global histogram and the current run's summary."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def _agent_of(chat_history: ChatHistory) -> str:
+    # ChatCompletionAgent sends its instructions as a system message named after itself
+    for message in chat_history.messages:
+        if message.role in (AuthorRole.SYSTEM, AuthorRole.DEVELOPER) and message.name:
+            return message.name
+    return "unknown"
+
+
+class InstrumentedChatCompletion(ChatCompletionClientBase):
+    """Chat completion service wrapper that records latency, time to first token and tokens per agent turn.
+
+    Token counts come from the response's usage metadata when present and are
+    estimated otherwise. Turns answered from the response cache are counted
+    separately.
+    """
+
+    inner_service: ChatCompletionClientBase
+
+    def __init__(self, inner_service: ChatCompletionClientBase):
+        super().__init__(ai_model_id=inner_service.ai_model_id, service_id=inner_service.service_id,
+                         inner_service=inner_service)
+
+    def get_prompt_execution_settings_class(self) -> type[PromptExecutionSettings]:
+        return self.inner_service.get_prompt_execution_settings_class()
+
+    def _record(self, chat_history: ChatHistory, messages: list, seconds: float, ttft: Optional[float]):
+        agent = _agent_of(chat_history)
+        usage = next((m.metadata.get("usage") for m in messages if m.metadata and m.metadata.get("usage")), None)
+        if usage is not None:
+            tokens_in, tokens_out = usage.prompt_tokens or 0, usage.completion_tokens or 0
+        else:
+            tokens_in = sum(estimate_tokens(m.content) for m in chat_history.messages)
+            tokens_out = sum(estimate_tokens(m.content) for m in messages)
+        cached = any(m.metadata and m.metadata.get("cache") == "hit" for m in messages)
+
+        turn_seconds.observe(seconds, agent=agent)
+        if ttft is not None:
+            ttft_seconds.observe(ttft, agent=agent)
+        turns_total.inc(agent=agent, cache="hit" if cached else "miss")
+        tokens_total.inc(tokens_in, agent=agent, direction="in")
+        tokens_total.inc(tokens_out, agent=agent, direction="out")
+        summary = current_run.get()
+        if summary is not None:
+            summary.add_turn(agent, seconds, ttft, tokens_in, tokens_out, cached)
+
+    async def get_chat_message_contents(self, chat_history: ChatHistory, settings: PromptExecutionSettings,
+                                        **kwargs: Any) -> list[ChatMessageContent]:
+        started = time.perf_counter()
+        responses = await self.inner_service.get_chat_message_contents(chat_history, settings, **kwargs)
+        self._record(chat_history, responses, time.perf_counter() - started, None)
+        return responses
+
+    async def get_streaming_chat_message_contents(
+        self, chat_history: ChatHistory, settings: PromptExecutionSettings, **kwargs: Any
+    ) -> AsyncGenerator[list[StreamingChatMessageContent], Any]:
+        started = time.perf_counter()
+        ttft = None
+        full: dict[int, StreamingChatMessageContent] = {}
+        async for chunks in self.inner_service.get_streaming_chat_message_contents(chat_history, settings, **kwargs):
+            if ttft is None and any(chunk.content for chunk in chunks):
+                ttft = time.perf_counter() - started
+            for chunk in chunks:
+                full[chunk.choice_index] = full[chunk.choice_index] + chunk if chunk.choice_index in full else chunk
+            yield chunks
+        self._record(chat_history, list(full.values()), time.perf_counter() - started, ttft)
@@ -0,0 +1,85 @@
+import os
+import subprocess
+import time
+
+import pytest
+
+from publisher import GitPublisher
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """A working repository whose origin is a local bare repository."""
+    remote = tmp_path / "remote.git"
+    work = tmp_path / "work"
+    git(tmp_path, "init", "-q", "--bare", str(remote))
+    git(tmp_path, "init", "-q", "-b", "main", str(work))
+    git(work, "config", "user.email", "publisher@example.com")
+    git(work, "config", "user.name", "Publisher")
+    git(work, "remote", "add", "origin", str(remote))
+    (work / "README.md").write_text("generated pages\n")
+    git(work, "add", "README.md")
+    git(work, "commit", "-q", "-m", "Initial commit")
+    git(work, "push", "-q", "origin", "main")
+    return work, remote
+
+
+def write(path, text: str) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return str(path)
+
+
+def quiet_publisher(work, **kwargs) -> GitPublisher:
+    return GitPublisher(str(work), branch="main", on_status=lambda state, detail: None, **kwargs)
+
+
+def test_coalesces_and_leaves_other_files_alone(repo):
+    work, remote = repo
+    publisher = quiet_publisher(work, coalesce_delay=0.5)
+    write(work / "scratch.txt", "not for publishing\n")
+    futures = []
+    for i in range(3):
+        futures.append(publisher.publish([write(work / "generated" / str(i) / "index.html", f"<p>{i}</p>")],
+                                         f"Update page {i}"))
+        time.sleep(0.05)
+    results = [future.result(timeout=30) for future in futures]
+    publisher.close()
+
+    assert len({result.commit for result in results}) == 1
+    assert all(result.pushed and result.error is None for result in results)
+    assert git(remote, "rev-list", "--count", "main").strip() == "2"
+    assert git(work, "status", "--porcelain").strip() == "?? scratch.txt"
+
+
+def test_failed_push_goes_out_with_the_next_batch(repo):
+    work, remote = repo
+    publisher = quiet_publisher(work, coalesce_delay=0, max_attempts=3, backoff=0.01)
+    git(work, "remote", "set-url", "origin", str(work.parent / "missing.git"))
+    failed = publisher.publish([write(work / "a.html", "a")], "Update a").result(timeout=30)
+    assert failed.commit and not failed.pushed and failed.attempts == 3 and failed.error
+
+    git(work, "remote", "set-url", "origin", str(remote))
+    result = publisher.publish([write(work / "b.html", "b")], "Update b").result(timeout=30)
+    publisher.close()
+    assert result.pushed
+    assert git(remote, "log", "--format=%s", "main").split("\n")[:2] == ["Update b", "Update a"]
+
+
+def test_survives_git_missing_from_path(repo, monkeypatch):
+    work, _ = repo
+    publisher = quiet_publisher(work, coalesce_delay=0)
+    monkeypatch.setenv("PATH", str(work))
+    result = publisher.publish([write(work / "a.html", "a")], "Update a").result(timeout=30)
+    assert result.error and not result.pushed
+    assert publisher._thread.is_alive()
+
+    monkeypatch.undo()
+    result = publisher.publish([write(work / "b.html", "b")], "Update b").result(timeout=30)
+    publisher.close()
+    assert result.pushed and result.error is None
@@ -0,0 +1,42 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from strategies import REVIEWER, ApprovalTerminationStrategy
+
+TASK = ChatMessageContent(role=AuthorRole.USER, content="Build a calculator")
+PAGE = "<!DOCTYPE html><html><body>calculator</body></html>"
+
+
+def terminates(reply: str, artifact=PAGE) -> tuple[bool, object]:
+    strategy = ApprovalTerminationStrategy(agents=[])
+    strategy.artifact = artifact
+    history = [TASK, ChatMessageContent(role=AuthorRole.ASSISTANT, name=REVIEWER, content=reply)]
+    stop = asyncio.run(strategy.should_agent_terminate(SimpleNamespace(name=REVIEWER), history))
+    return stop, strategy.reason
+
+
+@pytest.mark.parametrize("reply", [
+    "READY FOR USER APPROVAL",
+    "All acceptance criteria are met. READY FOR USER APPROVAL",
+    "Looks good.\n\n**Ready for user approval.**\n",
+])
+def test_reviewer_approval(reply):
+    assert terminates(reply) == (True, "approved")
+
+
+@pytest.mark.parametrize("reply", [
+    "The display overflows, so this is NOT READY FOR USER APPROVAL. Software Engineer, please fix it.",
+    "This is NOT READY FOR USER APPROVAL",
+    "Not yet ready for user approval.",
+    "Once the bugs are fixed it will be READY FOR USER APPROVAL; please fix the display.",
+])
+def test_reviewer_rejection_is_not_approval(reply):
+    assert terminates(reply) == (False, None)
+
+
+def test_reviewer_approval_needs_an_artifact():
+    assert terminates("READY FOR USER APPROVAL", artifact=None) == (False, None)
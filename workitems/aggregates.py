@@ -0,0 +1,68 @@
+import json
+from collections import Counter
+from typing import Optional
+
+from store import WorkItemRecord, split_tags
+
+
+class WorkItemStats:
+    """Incrementally maintained counts for dashboards.
+
+    Registered as a store listener; every added/removed item adjusts the
+    counters and bumps `version`. The serialized payload is rebuilt at most
+    once per version.
+    """
+
+    def __init__(self):
+        self.by_type: Counter = Counter()
+        self.by_state: Counter = Counter()
+        self.by_assignee: Counter = Counter()
+        self.by_tag: Counter = Counter()
+        self.state_by_type: Counter = Counter()
+        self.total = 0
+        self.version = 0
+        self._cached_version: Optional[int] = None
+        self._cached_body = b""
+
+    def _adjust(self, item: WorkItemRecord, delta: int):
+        self.total += delta
+        self.version += 1
+        for counter, key in (
+            (self.by_type, item.WorkItemType),
+            (self.by_state, item.State),
+            (self.by_assignee, item.AssignedTo),
+            (self.state_by_type, (item.State, item.WorkItemType)),
+        ):
+            counter[key] += delta
+            if counter[key] <= 0:
+                del counter[key]
+        for tag in split_tags(item.Tags):
+            self.by_tag[tag] += delta
+            if self.by_tag[tag] <= 0:
+                del self.by_tag[tag]
+
+    def added(self, item: WorkItemRecord):
+        self._adjust(item, 1)
+
+    def removed(self, item: WorkItemRecord):
+        self._adjust(item, -1)
+
+    def to_dict(self) -> dict:
+        state_by_type: dict[str, dict[str, int]] = {}
+        for (state, item_type), count in self.state_by_type.items():
+            state_by_type.setdefault(state, {})[item_type] = count
+        return {
+            "total": self.total,
+            "byType": dict(self.by_type),
+            "byState": dict(self.by_state),
+            "byAssignee": dict(self.by_assignee),
+            "byTag": dict(self.by_tag),
+            "stateByType": state_by_type,
+        }
+
+    def body(self) -> bytes:
+        """Return the JSON payload, re-serializing only when the counts changed."""
+        if self._cached_version != self.version:
+            self._cached_body = json.dumps(self.to_dict()).encode()
+            self._cached_version = self.version
+        return self._cached_body
@@ -1,10 +1,30 @@
-from fastapi import FastAPI, HTTPException
-import pandas as pd
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
 import os
-import csv
+import time
 import uvicorn
+from contextlib import asynccontextmanager
+from store import WorkItemRecord, WorkItemStore, WorkItemsDTO
+from journal import WorkItemExists, WorkItemJournal, WorkItemNotFound
+from sqlite_backend import SqliteWorkItemBackend
+from search import WorkItemSearchIndex
+from aggregates import WorkItemStats
+from caching import ResponseCache
+from ingest import iter_csv_upload_batches, iter_ndjson_batches, read_work_items_csv, work_items_adapter
+
+DATA_DIR = os.getenv("WORKITEMS_DATA_DIR", "data")
+CSV_PATH = os.path.join(DATA_DIR, "workitems.csv")
+# "journal" for a single process, "sqlite" to share state between uvicorn workers
+BACKEND = os.getenv("WORKITEMS_BACKEND", "journal")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    # Make sure every acknowledged write is on disk before exiting
+    await persistence.close()
 
 
 app = FastAPI(
@@ -14,41 +34,29 @@ app = FastAPI(
     servers=[
         {"url": "http://localhost:8000", "description": "Local development server"},
     ],
+    lifespan=lifespan,
 )
-class WorkItemsDTO(BaseModel):
-    ID: int
-    WorkItemType: str
-    Title: str
-    AssignedTo: str
-    State: str
-    Tags: str
-
-# Load CSV data into a DataFrame
-data = pd.read_csv("data/workitems.csv")
-
-workitems = []
-workItemTypes = set()
-workItemStates = set()
+workitems = WorkItemStore()
+search_index = WorkItemSearchIndex()
+workitems.add_listener(search_index)
+stats = WorkItemStats()
+workitems.add_listener(stats)
+if BACKEND == "sqlite":
+    persistence = SqliteWorkItemBackend(os.path.join(DATA_DIR, "workitems.db"), workitems)
+else:
+    persistence = WorkItemJournal(DATA_DIR, workitems)
+response_cache = ResponseCache(version_source=lambda: persistence.seq,
+                               max_items=int(os.getenv("RESPONSE_CACHE_MAX_ITEMS", "4096")))
+workitems.add_listener(response_cache)
 
 def load_work_items_from_csv(file_path):
     if os.path.exists(file_path):
-        with open(file_path, mode='r', encoding='utf-8-sig') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                print(row)
-                work_item = WorkItemsDTO(
-                    ID=int(row['ID']),
-                    WorkItemType=row['WorkItemType'],
-                    Title=row['Title'],
-                    AssignedTo=row['AssignedTo'],
-                    State=row['State'],
-                    Tags=row['Tags']
-                )
-                workitems.append(work_item)
-                workItemTypes.add(work_item.WorkItemType)
-                workItemStates.add(work_item.State)
-
-load_work_items_from_csv('data/workitems.csv')
+        return read_work_items_csv(file_path)
+    return []
+
+# Restore persisted state, seeding from the CSV on first run
+persistence.load(lambda: load_work_items_from_csv(CSV_PATH))
+response_cache.mark_loaded()
 
 
 app.add_middleware(
@@ -59,59 +67,202 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def sync_with_other_workers(request: Request, call_next):
+    # Applies changes committed by other workers (no-op for the journal backend)
+    await persistence.sync()
+    return await call_next(request)
+
+# Items serialized per chunk when streaming NDJSON
+STREAM_CHUNK_SIZE = 1000
+
+
+def parse_fields(fields: Optional[str]) -> Optional[set[str]]:
+    if not fields:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(WorkItemsDTO.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return requested
+
+
+async def stream_ndjson(items: list[WorkItemRecord], include: Optional[set[str]]):
+    for start in range(0, len(items), STREAM_CHUNK_SIZE):
+        chunk = items[start:start + STREAM_CHUNK_SIZE]
+        yield b"".join(item.to_dto().model_dump_json(include=include).encode() + b"\n" for item in chunk)
+
 @app.get("/workitems", response_model=list[WorkItemsDTO])
-async def get_all_work_items():
-    return workitems
+async def get_all_work_items(
+    request: Request,
+    type: Optional[str] = None,
+    state: Optional[str] = None,
+    assignee: Optional[str] = None,
+    tag: Optional[str] = None,
+    cursor: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    fields: Optional[str] = None,
+    format: Optional[str] = None,
+):
+    """List work items in ID order.
+
+    Filters are answered from the store indexes. Pass `limit` to page through
+    results; the `X-Next-Cursor` header holds the value to pass as `cursor`
+    for the next page. `fields` is a comma separated projection and
+    `format=ndjson` (or `Accept: application/x-ndjson`) streams one item per line.
+    """
+    include = parse_fields(fields)
+    filters = {
+        field: value
+        for field, value in (("WorkItemType", type), ("State", state), ("AssignedTo", assignee))
+        if value is not None
+    }
+
+    def render():
+        items, next_cursor = workitems.query(filters, tag=tag, after=cursor, limit=limit)
+        headers = {}
+        if next_cursor is not None:
+            headers["X-Next-Cursor"] = str(next_cursor)
+            next_url = request.url.include_query_params(cursor=next_cursor)
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        return items, headers
+
+    if format == "ndjson" or "application/x-ndjson" in request.headers.get("accept", ""):
+        items, headers = render()
+        return StreamingResponse(stream_ndjson(items, include), media_type="application/x-ndjson", headers=headers)
+
+    def render_json():
+        items, headers = render()
+        dtos = [item.to_dto() for item in items]
+        return work_items_adapter.dump_json(dtos, include={"__all__": include} if include else None), headers
+
+    etag, last_modified = response_cache.collection_etag()
+    return response_cache.respond(request, f"items?{request.url.query}", etag, last_modified, render_json)
+
+@app.get("/workitems/search")
+async def search_work_items(q: str, limit: int = Query(20, ge=1, le=1000)):
+    """Ranked search over titles and tags, e.g. `login -mobile`, `pay*`, `ui OR css`."""
+    return [
+        {"score": round(score, 4), "item": workitems.get(id).to_dto()}
+        for id, score in search_index.search(q, limit)
+    ]
+
+@app.get("/workitems/stats")
+async def get_work_item_stats(request: Request):
+    """Counts by type, state, assignee and tag plus a state x type cross-tab."""
+    return response_cache.respond(
+        request, "stats", f'"stats-{response_cache.version}"', response_cache.last_modified,
+        lambda: (stats.body(), {}),
+    )
 
 @app.get("/workitems/{id}", response_model=WorkItemsDTO)
-async def get_work_item_by_id(id: int):
-    work_item = next((item for item in workitems if item.ID == id), None)
+async def get_work_item_by_id(id: int, request: Request):
+    work_item = workitems.get(id)
     if not work_item:
         raise HTTPException(status_code=404, detail="Work item not found")
-    return work_item
+    etag, last_modified = response_cache.item_etag(id)
+    return response_cache.respond(
+        request, id, etag, last_modified, lambda: (work_item.to_dto().model_dump_json().encode(), {})
+    )
 
 @app.post("/workitems", response_model=WorkItemsDTO, status_code=201)
 async def create_work_item(new_work_item: WorkItemsDTO):
-    workitems.append(new_work_item)
-    workItemTypes.add(new_work_item.WorkItemType)
-    workItemStates.add(new_work_item.State)
-    return new_work_item
+    def prepare():
+        if new_work_item.ID in workitems:
+            raise HTTPException(status_code=409, detail="Work item already exists")
+        return [("create", WorkItemRecord.from_dto(new_work_item))], new_work_item
+    try:
+        return await persistence.mutate(prepare)
+    except WorkItemExists:
+        # Created by another worker after our replica last synced
+        raise HTTPException(status_code=409, detail="Work item already exists")
 
 @app.put("/workitems/{id}", response_model=WorkItemsDTO)
 async def update_work_item(id: int, updated_work_item: WorkItemsDTO):
-    work_item = next((item for item in workitems if item.ID == id), None)
+    # Only non-empty fields overwrite the stored item
+    changes = {
+        field: value
+        for field, value in updated_work_item.model_dump(exclude={"ID"}).items()
+        if value
+    }
+    def prepare():
+        work_item = workitems.get(id)
+        if not work_item:
+            raise HTTPException(status_code=404, detail="Work item not found")
+        if not changes:
+            return [], work_item
+        # Only the changed fields, so a concurrent update of other fields in another worker survives
+        return [("update", (id, changes))], None
+    try:
+        unchanged = await persistence.mutate(prepare)
+    except WorkItemNotFound:
+        raise HTTPException(status_code=404, detail="Work item not found")
+    # Once mutate returns, the store holds this update (or something committed after it)
+    work_item = unchanged or workitems.get(id)
     if not work_item:
         raise HTTPException(status_code=404, detail="Work item not found")
-    if updated_work_item.WorkItemType:
-        work_item.WorkItemType = updated_work_item.WorkItemType
-        workItemTypes.add(updated_work_item.WorkItemType)
-    if updated_work_item.Title:
-        work_item.Title = updated_work_item.Title
-    if updated_work_item.AssignedTo:
-        work_item.AssignedTo = updated_work_item.AssignedTo
-    if updated_work_item.State:
-        work_item.State = updated_work_item.State
-        workItemStates.add(updated_work_item.State)
-    if updated_work_item.Tags:
-        work_item.Tags = updated_work_item.Tags
-    return work_item
+    return work_item.to_dto()
 
 @app.delete("/workitems/{id}", status_code=204)
 async def delete_work_item(id: int):
-    global workitems
-    work_item = next((item for item in workitems if item.ID == id), None)
-    if not work_item:
+    def prepare():
+        if id not in workitems:
+            raise HTTPException(status_code=404, detail="Work item not found")
+        return [("delete", id)], None
+    try:
+        await persistence.mutate(prepare)
+    except WorkItemNotFound:
+        # Deleted by another worker after our replica last synced
         raise HTTPException(status_code=404, detail="Work item not found")
-    workitems = [item for item in workitems if item.ID != id]
     return
 
+@app.post("/workitems:bulk")
+async def bulk_import_work_items(request: Request):
+    """Upsert work items from a streamed CSV or NDJSON body and report throughput."""
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "json" in content_type:
+        batches = iter_ndjson_batches(request.stream())
+    elif "csv" in content_type:
+        batches = iter_csv_upload_batches(request.stream())
+    else:
+        raise HTTPException(status_code=415, detail="Use text/csv or application/x-ndjson")
+
+    started = time.perf_counter()
+    imported = 0
+    try:
+        async for batch in batches:
+            await persistence.mutate(lambda: ([("put", work_item) for work_item in batch], None))
+            imported += len(batch)
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid import after {imported} items: {e}")
+    seconds = time.perf_counter() - started
+    return {
+        "imported": imported,
+        "seconds": round(seconds, 3),
+        "items_per_second": round(imported / seconds) if seconds else imported,
+    }
+
 @app.get("/workitemtypes", response_model=list[str])
 async def get_work_item_types():
-    return list(workItemTypes)
+    return list(stats.by_type)
 
 @app.get("/workitemstates", response_model=list[str])
 async def get_work_item_states():
-    return list(workItemStates)
+    return list(stats.by_state)
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the Work Items API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes; more than one requires WORKITEMS_BACKEND=sqlite")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        if BACKEND != "sqlite":
+            parser.error("multiple workers need shared state: set WORKITEMS_BACKEND=sqlite")
+        uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
\ No newline at end of file
@@ -0,0 +1,163 @@
+import gzip
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_SIZE = 1024
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+
+def not_modified_since(if_modified_since: Optional[str], last_modified: float) -> bool:
+    if not if_modified_since:
+        return False
+    try:
+        return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+class CachedBody:
+    __slots__ = ("body", "headers", "encoded")
+
+    def __init__(self, body: bytes, headers: dict):
+        self.body = body
+        self.headers = headers
+        self.encoded: dict[str, bytes] = {}
+
+    def encode(self, accept_encoding: str) -> tuple[bytes, Optional[str]]:
+        """Return the body in the best encoding the client accepts, compressing at most once."""
+        if len(self.body) < MIN_COMPRESS_SIZE:
+            return self.body, None
+        for encoding in ("br", "gzip"):
+            if encoding not in accept_encoding or (encoding == "br" and brotli is None):
+                continue
+            if encoding not in self.encoded:
+                self.encoded[encoding] = brotli.compress(self.body) if encoding == "br" else gzip.compress(self.body, 5)
+            return self.encoded[encoding], encoding
+        return self.body, None
+
+
+class ResponseCache:
+    """Version counters and pre-serialized responses for the Work Items API.
+
+    Registered as a store listener: every change moves the global version to
+    the persistence sequence number of that change, records it as the item's
+    version and drops the cached bodies it affects. Sequence numbers survive
+    restarts and are shared between workers, so ETags stay valid across both.
+    Item versions are only tracked for changes after `mark_loaded`; untouched
+    items carry the version the store was loaded at, so the initial load
+    costs nothing per item.
+
+    Handlers call `respond`, which answers conditional requests with a 304
+    before anything is serialized and otherwise serves a cached (and
+    optionally compressed) body. Item and collection bodies are each kept
+    in an LRU, of `max_items` and `max_collections` entries.
+    """
+
+    def __init__(self, version_source: Callable[[], int], max_collections: int = 256, max_items: int = 4096):
+        self.version_source = version_source
+        self.version = 0
+        self.loaded_version = 0
+        self.loaded_at = time.time()
+        self.last_modified = self.loaded_at
+        self.max_collections = max_collections
+        self.max_items = max_items
+        self._loaded = False
+        self._item_versions: dict[int, tuple[int, float]] = {}
+        self._items: OrderedDict[int, CachedBody] = OrderedDict()
+        self._collections: OrderedDict[str, CachedBody] = OrderedDict()
+
+    def mark_loaded(self):
+        self._loaded = True
+        self.version = self.loaded_version = self.version_source()
+        self.loaded_at = self.last_modified = time.time()
+
+    def _touch(self, id: int):
+        self.version = self.version_source()
+        self.last_modified = time.time()
+        self._items.pop(id, None)
+        self._collections.clear()
+        if self._loaded:
+            self._item_versions[id] = (self.version, self.last_modified)
+
+    def added(self, item):
+        self._touch(item.ID)
+
+    def removed(self, item):
+        self._touch(item.ID)
+
+    def item_version(self, id: int) -> tuple[int, float]:
+        return self._item_versions.get(id, (self.loaded_version, self.loaded_at))
+
+    def item_etag(self, id: int) -> tuple[str, float]:
+        version, modified = self.item_version(id)
+        return f'"item-{id}-{version}"', modified
+
+    def collection_etag(self) -> tuple[str, float]:
+        return f'"items-{self.version}"', self.last_modified
+
+    def _lookup(self, key) -> Optional[CachedBody]:
+        entries = self._items if isinstance(key, int) else self._collections
+        cached = entries.get(key)
+        if cached is not None:
+            entries.move_to_end(key)
+        return cached
+
+    def _store(self, key, cached: CachedBody):
+        if isinstance(key, int):
+            entries, limit = self._items, self.max_items
+        else:
+            entries, limit = self._collections, self.max_collections
+        entries[key] = cached
+        if len(entries) > limit:
+            entries.popitem(last=False)
+
+    def respond(self, request: Request, key, etag: str, last_modified: float,
+                render: Callable[[], tuple[bytes, dict]], media_type: str = "application/json") -> Response:
+        """Serve `key` with conditional-request and compression support.
+
+        `key` is an item ID or a string naming a collection view (cleared on
+        any change). `render` returns the body and extra headers on a miss.
+        """
+        headers = {
+            "ETag": etag,
+            "Last-Modified": http_date(last_modified),
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if etag_matches(if_none_match, etag) or (
+            if_none_match is None and not_modified_since(request.headers.get("if-modified-since"), last_modified)
+        ):
+            return Response(status_code=304, headers=headers)
+
+        cached = self._lookup(key)
+        if cached is None:
+            body, extra_headers = render()
+            cached = CachedBody(body, extra_headers)
+            self._store(key, cached)
+        body, encoding = cached.encode(request.headers.get("accept-encoding", ""))
+        headers.update(cached.headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=media_type, headers=headers)
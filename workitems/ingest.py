@@ -0,0 +1,104 @@
+import asyncio
+import os
+import tempfile
+from typing import AsyncIterator, Iterator
+
+import pandas as pd
+from pydantic import TypeAdapter
+
+from store import WorkItemRecord, WorkItemsDTO
+
+CSV_COLUMNS = list(WorkItemsDTO.model_fields)
+CSV_DTYPES = {column: ("int64" if column == "ID" else str) for column in CSV_COLUMNS}
+
+# Rows parsed and applied per batch during imports
+BATCH_SIZE = 10000
+# Bytes of an uploaded CSV buffered in memory between writes to its spool file
+SPOOL_BUFFER = 1 << 20
+
+work_items_adapter = TypeAdapter(list[WorkItemsDTO])
+
+
+def frame_to_work_items(frame: pd.DataFrame) -> list[WorkItemRecord]:
+    """Build records column-wise from an already typed frame, skipping per-row validation."""
+    columns = [frame[column].tolist() for column in CSV_COLUMNS]
+    return [WorkItemRecord(*row) for row in zip(*columns)]
+
+
+def iter_csv_batches(file_path, batch_size: int = BATCH_SIZE) -> Iterator[list[WorkItemRecord]]:
+    """Parse a work item CSV in one vectorized pass, yielding batches of records."""
+    reader = pd.read_csv(
+        file_path,
+        usecols=CSV_COLUMNS,
+        dtype=CSV_DTYPES,
+        keep_default_na=False,
+        encoding="utf-8-sig",
+        chunksize=batch_size,
+    )
+    with reader:
+        for frame in reader:
+            yield frame_to_work_items(frame)
+
+
+def read_work_items_csv(file_path) -> list[WorkItemRecord]:
+    items = []
+    for batch in iter_csv_batches(file_path):
+        items.extend(batch)
+    return items
+
+
+def records_from_ndjson(lines: list[bytes]) -> list[WorkItemRecord]:
+    """Validate a batch of NDJSON lines in one call and convert them to records."""
+    return [WorkItemRecord.from_dto(dto) for dto in work_items_adapter.validate_json(b"[" + b",".join(lines) + b"]")]
+
+
+async def iter_ndjson_batches(chunks: AsyncIterator[bytes], batch_size: int = BATCH_SIZE) -> AsyncIterator[list[WorkItemRecord]]:
+    """Split a streamed NDJSON body into lines and validate each batch in one call."""
+    remainder = b""
+    lines = []
+    async for chunk in chunks:
+        parts = (remainder + chunk).split(b"\n")
+        remainder = parts.pop()
+        lines.extend(line for line in parts if line.strip())
+        if len(lines) >= batch_size:
+            yield records_from_ndjson(lines)
+            lines = []
+    if remainder.strip():
+        lines.append(remainder)
+    if lines:
+        yield records_from_ndjson(lines)
+
+
+async def iter_csv_upload_batches(chunks: AsyncIterator[bytes], batch_size: int = BATCH_SIZE,
+                                  spool_buffer: int = SPOOL_BUFFER) -> AsyncIterator[list[WorkItemRecord]]:
+    """Spool a streamed CSV body to a temp file, then parse it in chunks off the event loop.
+
+    Spooling keeps memory flat for large uploads and lets pandas handle quoted
+    fields that span chunk boundaries. Chunks are written `spool_buffer`
+    bytes at a time in a worker thread, and the file is removed however the
+    upload ends, a client disconnect included.
+    """
+    spool = tempfile.NamedTemporaryFile(suffix=".csv", delete=False)
+    batches = None
+    try:
+        pending, size = [], 0
+        async for chunk in chunks:
+            pending.append(chunk)
+            size += len(chunk)
+            if size >= spool_buffer:
+                await asyncio.to_thread(spool.write, b"".join(pending))
+                pending, size = [], 0
+        if pending:
+            await asyncio.to_thread(spool.write, b"".join(pending))
+        await asyncio.to_thread(spool.close)
+        batches = iter_csv_batches(spool.name, batch_size)
+        while True:
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                break
+            yield batch
+    finally:
+        if batches is not None:
+            batches.close()
+        spool.close()
+        os.remove(spool.name)
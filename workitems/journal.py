@@ -0,0 +1,332 @@
+import asyncio
+import json
+import os
+from typing import Any, Callable, Iterable, Optional
+
+from store import WorkItemRecord, WorkItemStore
+
+# A mutation is ("create", record), ("put", record), ("update", (id, {field: value})) or
+# ("delete", id). A create is a put that must not replace an existing item; an update changes
+# only the given fields of an existing one.
+Op = tuple[str, Any]
+
+
+class WorkItemExists(Exception):
+    """A create collided with an item committed in the meantime."""
+
+    def __init__(self, id: int):
+        super().__init__(f"Work item {id} already exists")
+        self.id = id
+
+
+class WorkItemNotFound(Exception):
+    """An update or delete found its item already deleted."""
+
+    def __init__(self, id: int):
+        super().__init__(f"Work item {id} not found")
+        self.id = id
+
+
+def op_id(op: str, value) -> int:
+    if op == "delete":
+        return value
+    if op == "update":
+        return value[0]
+    return value.ID
+
+
+def apply_op(store: WorkItemStore, op: str, value):
+    if op in ("create", "put"):
+        store.put(value)
+    elif op == "update":
+        id, changes = value
+        store.put(WorkItemRecord(**{**store.get(id).to_dict(), **changes}))
+    elif op == "delete":
+        store.delete(value)
+
+
+class GroupCommitter:
+    """Batches queued writes so concurrent requests share one commit.
+
+    `_enqueue` returns a future per payload. A background task hands
+    everything pending to `_write_batch` in a worker thread and resolves the
+    futures once it returns, so while one batch is being flushed the next
+    one accumulates. `_write_batch` may return one outcome per payload: an
+    exception fails just that payload's future, anything else is its result.
+    """
+
+    def __init__(self, commit_delay: float = 0.0):
+        self.commit_delay = commit_delay
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop = None
+        self._last_future: Optional[asyncio.Future] = None
+
+    def _enqueue(self, payload) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._writer())
+        future = loop.create_future()
+        self._pending.append((payload, future))
+        self._last_future = future
+        self._wakeup.set()
+        return future
+
+    async def _writer(self):
+        while True:
+            await self._wakeup.wait()
+            if self.commit_delay:
+                await asyncio.sleep(self.commit_delay)
+            self._wakeup.clear()
+            batch, self._pending = self._pending, []
+            if not batch:
+                continue
+            try:
+                outcomes = await asyncio.to_thread(self._write_batch, [payload for payload, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                await self._batch_failed(e)
+                continue
+            for index, (_, future) in enumerate(batch):
+                outcome = outcomes[index] if outcomes is not None else None
+                if future.done():
+                    continue
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+            self._after_batch(len(batch))
+
+    def _write_batch(self, payloads: list) -> Optional[list]:
+        raise NotImplementedError
+
+    def _after_batch(self, size: int):
+        pass
+
+    async def _batch_failed(self, error: Exception):
+        pass
+
+    async def _drain(self):
+        if self._last_future is not None and self._task is not None and not self._task.done():
+            await asyncio.gather(self._last_future, return_exceptions=True)
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+class WorkItemJournal(GroupCommitter):
+    """Append-only write-ahead journal with periodic compacted snapshots.
+
+    Every mutation is appended as one JSON line tagged with a sequence number
+    and group-committed with a single write and fsync. Once the journal grows
+    past `compact_every` entries it is rotated and a snapshot of the store is
+    written next to it; startup loads the snapshot and replays only the
+    journal entries newer than it.
+
+    Journal entries are full-item puts or deletes, so replaying an entry that
+    the snapshot already reflects is harmless.
+
+    Ops reach memory before they are durable, so if a commit fails the file
+    is truncated back to where the batch started and every op not yet on
+    disk is undone, failing the writes queued behind it too; if even the
+    truncation fails, the journal refuses further writes. Sequence numbers
+    are not reused, so a rollback leaves a gap. On replay only a torn final
+    line (a crash mid-append, never acknowledged) is skipped; anything
+    unreadable before it is an error.
+    """
+
+    def __init__(self, data_dir: str, store: WorkItemStore,
+                 compact_every: int = 10000, commit_delay: float = 0.0):
+        super().__init__(commit_delay)
+        self.store = store
+        self.snapshot_path = os.path.join(data_dir, "workitems.snapshot.json")
+        self.journal_path = os.path.join(data_dir, "workitems.journal")
+        self.rotated_path = self.journal_path + ".1"
+        self.compact_every = compact_every
+        self.seq = 0
+        self._entries_since_snapshot = 0
+        self._file = None
+        self._compaction: Optional[asyncio.Task] = None
+        # (id, previous record or None) per op applied but not yet durable, in apply order
+        self._undo: list[tuple[int, Optional[WorkItemRecord]]] = []
+        self._failed: Optional[Exception] = None
+
+    # --- Startup
+
+    def exists(self) -> bool:
+        return any(os.path.exists(path) for path in (self.snapshot_path, self.rotated_path, self.journal_path))
+
+    def load(self, seed: Callable[[], Iterable[WorkItemRecord]]):
+        """Restore the store from disk, or from `seed` on first run."""
+        if self.exists():
+            self.replay()
+        else:
+            self.store.load(seed())
+            self.write_snapshot()
+
+    def replay(self):
+        """Load the snapshot, then apply journal entries newer than it."""
+        snapshot_seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            snapshot_seq = snapshot["seq"]
+            self.seq = snapshot_seq
+            for item in snapshot["items"]:
+                self.store.put(WorkItemRecord(**item))
+
+        paths = [path for path in (self.rotated_path, self.journal_path) if os.path.exists(path)]
+        for path in paths:
+            with open(path, "rb") as f:
+                offset = 0
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("unterminated line")
+                        entry = json.loads(line)
+                    except ValueError:
+                        if path != paths[-1] or f.read().strip():
+                            raise ValueError(f"Corrupt journal entry in {path} at byte {offset}")
+                        # Torn write from a crash mid-append, never acknowledged; cut it off
+                        # so the next append starts on a clean line
+                        with open(path, "r+b") as torn:
+                            torn.truncate(offset)
+                        break
+                    offset += len(line)
+                    if entry["seq"] <= snapshot_seq:
+                        continue
+                    self.seq = entry["seq"]
+                    if entry["op"] == "put":
+                        apply_op(self.store, "put", WorkItemRecord(**entry["item"]))
+                    else:
+                        apply_op(self.store, "delete", entry["id"])
+                    self._entries_since_snapshot += 1
+
+        if os.path.exists(self.rotated_path):
+            # A compaction was interrupted; fold everything into a fresh snapshot
+            # so the next rotation cannot overwrite unsnapshotted entries.
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        """Synchronously write a snapshot of the current store and reset the journal."""
+        self._write_snapshot_file(self.seq, self.store.all())
+        for path in (self.rotated_path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._entries_since_snapshot = 0
+
+    # --- Writes
+
+    async def mutate(self, prepare: Callable[[], tuple[list[Op], Any]]):
+        """Apply the ops returned by `prepare` and wait until they are durable.
+
+        `prepare` runs under the store lock against the current state and
+        returns (ops, result); it may raise to reject the change. Sequence
+        numbers are assigned in apply order, and the lock is released before
+        waiting on the disk so other writers can join the same commit. If
+        the commit fails, the ops are undone and the error is raised.
+        """
+        committed = []
+        async with self.store.lock:
+            if self._failed is not None:
+                raise RuntimeError("Work item journal is unavailable after a failed write") from self._failed
+            ops, result = prepare()
+            for op, value in ops:
+                self.seq += 1
+                id = op_id(op, value)
+                self._undo.append((id, self.store.get(id)))
+                apply_op(self.store, op, value)
+                # Creates and updates are checked by `prepare` under the lock, so on disk they
+                # are plain puts of the resulting item
+                if op == "delete":
+                    entry = {"seq": self.seq, "op": "delete", "id": value}
+                else:
+                    entry = {"seq": self.seq, "op": "put", "item": self.store.get(id).to_dict()}
+                committed.append(self._enqueue(json.dumps(entry).encode() + b"\n"))
+        if committed:
+            await asyncio.gather(*committed)
+        return result
+
+    async def sync(self):
+        """Single-process backend: the store is always current."""
+
+    def _write_batch(self, lines: list[bytes]):
+        if self._file is None:
+            # Unbuffered, so a failed write leaves nothing behind to be flushed later
+            self._file = open(self.journal_path, "ab", buffering=0)
+        fd = self._file.fileno()
+        start = os.fstat(fd).st_size
+        try:
+            data = memoryview(b"".join(lines))
+            while data:
+                data = data[os.write(fd, data):]
+            os.fsync(fd)
+        except BaseException:
+            try:
+                os.ftruncate(fd, start)
+                os.fsync(fd)
+            except OSError as e:
+                self._failed = e
+            raise
+
+    def _after_batch(self, size: int):
+        del self._undo[:size]
+        self._entries_since_snapshot += size
+        # Only while nothing is in flight, so the snapshot holds durable state alone
+        if (self._entries_since_snapshot >= self.compact_every and self._compaction is None
+                and not self._undo and not os.path.exists(self.rotated_path)):
+            self._rotate()
+            self._compaction = asyncio.create_task(self._compact(self.seq, self.store.all()))
+
+    async def _batch_failed(self, error: Exception):
+        async with self.store.lock:
+            # Writes queued behind the failed batch were validated against its ops; they go too
+            pending, self._pending = self._pending, []
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(error)
+            for id, previous in reversed(self._undo):
+                if previous is None:
+                    apply_op(self.store, "delete", id)
+                else:
+                    apply_op(self.store, "put", previous)
+            self._undo = []
+
+    def _rotate(self):
+        """Move the current journal aside; new writes go to a fresh file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        os.replace(self.journal_path, self.rotated_path)
+        self._entries_since_snapshot = 0
+
+    async def _compact(self, seq: int, items: list[WorkItemRecord]):
+        try:
+            await asyncio.to_thread(self._write_snapshot_file, seq, items)
+            os.remove(self.rotated_path)
+        except Exception as e:
+            print(f"Journal compaction failed: {e}")
+        finally:
+            self._compaction = None
+
+    def _write_snapshot_file(self, seq: int, items: list[WorkItemRecord]):
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"seq": seq, "items": [item.to_dict() for item in items]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+    async def close(self):
+        """Flush pending entries and stop the writer."""
+        await self._drain()
+        if self._compaction is not None:
+            await self._compaction
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,140 @@
+import bisect
+import math
+import re
+from typing import Optional
+
+from store import WorkItemRecord, split_tags
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Tag matches count more than title words when ranking
+TITLE_WEIGHT = 1.0
+TAG_WEIGHT = 2.0
+
+# Upper bound on vocabulary terms a single prefix query may expand to
+MAX_PREFIX_EXPANSION = 500
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class WorkItemSearchIndex:
+    """Inverted index over work item titles and tags.
+
+    Registered as a store listener, so postings are updated incrementally as
+    items are created, updated and deleted. Queries support:
+
+    - `word` terms, all of which must match (implicit AND)
+    - `pre*` prefix terms
+    - `-word` or `NOT word` to exclude
+    - `OR` between groups of terms
+
+    Results are ranked by the sum of tf-idf weights of the matched terms.
+    """
+
+    def __init__(self):
+        self._postings: dict[str, dict[int, float]] = {}
+        self._vocabulary: list[str] = []
+        self._documents = 0
+
+    def __len__(self):
+        return self._documents
+
+    @staticmethod
+    def _weights(item: WorkItemRecord) -> dict[str, float]:
+        weights: dict[str, float] = {}
+        for token in tokenize(item.Title):
+            weights[token] = weights.get(token, 0.0) + TITLE_WEIGHT
+        for tag in split_tags(item.Tags):
+            for token in tokenize(tag):
+                weights[token] = weights.get(token, 0.0) + TAG_WEIGHT
+        return weights
+
+    def added(self, item: WorkItemRecord):
+        self._documents += 1
+        for token, weight in self._weights(item).items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                bisect.insort(self._vocabulary, token)
+            postings[item.ID] = weight
+
+    def removed(self, item: WorkItemRecord):
+        self._documents -= 1
+        for token in self._weights(item):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(item.ID, None)
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+
+    def _expand(self, token: str) -> list[str]:
+        start = bisect.bisect_left(self._vocabulary, token)
+        expansion = []
+        for term in self._vocabulary[start:start + MAX_PREFIX_EXPANSION]:
+            if not term.startswith(token):
+                break
+            expansion.append(term)
+        return expansion
+
+    def _match(self, token: str, prefix: bool) -> dict[int, float]:
+        """Return {id: score} for one query term."""
+        terms = self._expand(token) if prefix else [token]
+        scores: dict[int, float] = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + self._documents / len(postings))
+            for id, weight in postings.items():
+                score = weight * idf
+                if score > scores.get(id, 0.0):
+                    scores[id] = score
+        return scores
+
+    @staticmethod
+    def parse(query: str) -> list[tuple[list[tuple[str, bool]], list[tuple[str, bool]]]]:
+        """Parse a query into OR-ed clauses of (required terms, excluded terms).
+
+        Each term is a (token, is_prefix) pair.
+        """
+        clauses = []
+        required: list[tuple[str, bool]] = []
+        excluded: list[tuple[str, bool]] = []
+        negate_next = False
+        for word in query.split():
+            if word == "OR":
+                clauses.append((required, excluded))
+                required, excluded = [], []
+                continue
+            if word == "AND":
+                continue
+            if word == "NOT":
+                negate_next = True
+                continue
+            negate = negate_next or word.startswith("-")
+            negate_next = False
+            prefix = word.endswith("*")
+            tokens = tokenize(word)
+            terms = [(token, prefix and i == len(tokens) - 1) for i, token in enumerate(tokens)]
+            (excluded if negate else required).extend(terms)
+        clauses.append((required, excluded))
+        return [clause for clause in clauses if clause[0]]
+
+    def search(self, query: str, limit: Optional[int] = 20) -> list[tuple[int, float]]:
+        """Return (id, score) pairs for the best matches, highest score first."""
+        results: dict[int, float] = {}
+        for required, excluded in self.parse(query):
+            matches = sorted((self._match(token, prefix) for token, prefix in required), key=len)
+            ids = set(matches[0]).intersection(*matches[1:])
+            for token, prefix in excluded:
+                ids.difference_update(self._match(token, prefix))
+            for id in ids:
+                score = sum(match[id] for match in matches)
+                if score > results.get(id, 0.0):
+                    results[id] = score
+        ranked = sorted(results.items(), key=lambda result: (-result[1], result[0]))
+        return ranked if limit is None else ranked[:limit]
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional
+
+from journal import GroupCommitter, Op, WorkItemExists, WorkItemNotFound, apply_op
+from store import FIELDS, WorkItemRecord, WorkItemStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workitems (
+    ID INTEGER PRIMARY KEY,
+    WorkItemType TEXT NOT NULL,
+    Title TEXT NOT NULL,
+    AssignedTo TEXT NOT NULL,
+    State TEXT NOT NULL,
+    Tags TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    op TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    item TEXT
+);
+"""
+
+INSERT = f"INSERT INTO workitems ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})"
+UPSERT = INSERT.replace("INSERT", "INSERT OR REPLACE", 1)
+
+
+class SqliteWorkItemBackend(GroupCommitter):
+    """Work item persistence shared by several uvicorn worker processes.
+
+    SQLite in WAL mode is the source of truth: the `workitems` table holds
+    current state and `changes` is an ordered log of every mutation. Each
+    worker keeps its own in-memory store (with its indexes and caches) as a
+    replica of that log, so reads stay local and scale with the number of
+    workers.
+
+    Writes are group-committed in one transaction per batch and never applied
+    to memory directly; a worker applies its own and everyone else's changes
+    in log order through `sync`, which keeps replicas identical and lets the
+    store listeners invalidate cached responses across workers. `sync` runs
+    before each request, at most once per `sync_interval` seconds, and reads
+    the database in a worker thread.
+
+    A replica can lag behind other workers, so whatever a write depends on
+    is checked again inside the transaction: creates insert without
+    replacing, updates set only the fields they change on the current row,
+    and updates or deletes of a row that is gone fail. Each request's ops
+    run in their own savepoint, so a conflict fails that request alone.
+    """
+
+    def __init__(self, db_path: str, store: WorkItemStore, sync_interval: float = 0.05,
+                 change_retention: int = 100000, commit_delay: float = 0.0):
+        super().__init__(commit_delay)
+        self.db_path = db_path
+        self.store = store
+        self.sync_interval = sync_interval
+        self.change_retention = change_retention
+        self.seq = 0
+        self._last_sync = 0.0
+        self._conn = self._connect()
+        self._conn.executescript(SCHEMA)
+        self._write_conn = None
+        self._write_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        return conn
+
+    # --- Startup
+
+    def load(self, seed: Callable[[], Iterable[WorkItemRecord]]):
+        """Seed the database on first run (once across workers), then load it into the store."""
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            empty = conn.execute("SELECT NOT EXISTS (SELECT 1 FROM workitems) AND NOT EXISTS (SELECT 1 FROM changes)").fetchone()[0]
+            if empty:
+                conn.executemany(UPSERT, ([getattr(item, field) for field in FIELDS] for item in seed()))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._reload()
+
+    def _read_all(self) -> tuple[int, list[tuple]]:
+        """A consistent read of the whole table and the log position it reflects."""
+        conn = self._conn
+        conn.execute("BEGIN")
+        try:
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+            rows = conn.execute(f"SELECT {', '.join(FIELDS)} FROM workitems").fetchall()
+        finally:
+            conn.execute("COMMIT")
+        return seq, rows
+
+    def _reload(self, state: Optional[tuple[int, list[tuple]]] = None):
+        """Replace the store contents with `state`, or with a fresh read of the database."""
+        seq, rows = state if state is not None else self._read_all()
+        self.seq = seq
+        self.store.clear()
+        self.store.load(WorkItemRecord(*row) for row in rows)
+
+    # --- Reads
+
+    async def sync(self, force: bool = False):
+        """Apply changes committed by any worker since the last sync."""
+        now = time.monotonic()
+        if not force and now - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = now
+        async with self.store.lock:
+            rows, pruned = await asyncio.to_thread(self._read_changes, self.seq)
+            if not rows:
+                return
+            if pruned:
+                # Fell behind the retained log; start over from the table
+                self._reload(await asyncio.to_thread(self._read_all))
+                return
+            for seq, op, id, item in rows:
+                self.seq = seq
+                if op == "put":
+                    apply_op(self.store, "put", WorkItemRecord(**json.loads(item)))
+                else:
+                    apply_op(self.store, "delete", id)
+
+    def _read_changes(self, seq: int) -> tuple[list[tuple], bool]:
+        """Log entries after `seq`, and whether entries right after it were already pruned."""
+        rows = self._conn.execute(
+            "SELECT seq, op, id, item FROM changes WHERE seq > ? ORDER BY seq", (seq,)
+        ).fetchall()
+        if not rows or rows[0][0] == seq + 1:
+            return rows, False
+        oldest = self._conn.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+        return rows, oldest is not None and oldest > seq + 1
+
+    # --- Writes
+
+    async def mutate(self, prepare: Callable[[], tuple[list[Op], Any]]):
+        """Validate with `prepare` against fresh state, commit, then catch up.
+
+        `prepare` runs under the store lock and returns (ops, result); it may
+        raise to reject the change. The lock is released before waiting on
+        the commit, so concurrent requests share one transaction. A conflict
+        found in the transaction raises WorkItemExists or WorkItemNotFound;
+        puts are last-writer-wins in commit order.
+        """
+        await self.sync(force=True)
+        async with self.store.lock:
+            ops, result = prepare()
+            committed = self._enqueue(ops) if ops else None
+        if committed is not None:
+            try:
+                await committed
+            finally:
+                # Also after a conflict, which means another worker's write is waiting in the log
+                await self.sync(force=True)
+        return result
+
+    def _write_batch(self, batches: list[list[Op]]) -> list[Optional[Exception]]:
+        outcomes: list[Optional[Exception]] = []
+        with self._write_lock:
+            if self._write_conn is None:
+                self._write_conn = self._connect()
+            conn = self._write_conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for ops in batches:
+                    conn.execute("SAVEPOINT request")
+                    try:
+                        for op, value in ops:
+                            self._write_op(conn, op, value)
+                    except (WorkItemExists, WorkItemNotFound) as e:
+                        conn.execute("ROLLBACK TO request")
+                        outcomes.append(e)
+                    else:
+                        outcomes.append(None)
+                    conn.execute("RELEASE request")
+                conn.execute("DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?",
+                             (self.change_retention,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return outcomes
+
+    @staticmethod
+    def _write_op(conn: sqlite3.Connection, op: str, value):
+        if op == "delete":
+            if conn.execute("DELETE FROM workitems WHERE ID = ?", (value,)).rowcount == 0:
+                raise WorkItemNotFound(value)
+            conn.execute("INSERT INTO changes (op, id) VALUES ('delete', ?)", (value,))
+            return
+        if op == "update":
+            id, changes = value
+            fields = [field for field in FIELDS if field in changes and field != "ID"]
+            if fields:
+                conn.execute(f"UPDATE workitems SET {', '.join(f'{field} = ?' for field in fields)} WHERE ID = ?",
+                             [changes[field] for field in fields] + [id])
+            row = conn.execute(f"SELECT {', '.join(FIELDS)} FROM workitems WHERE ID = ?", (id,)).fetchone()
+            if row is None:
+                raise WorkItemNotFound(id)
+            item = dict(zip(FIELDS, row))
+        else:
+            id, item = value.ID, value.to_dict()
+            try:
+                conn.execute(INSERT if op == "create" else UPSERT, [item[field] for field in FIELDS])
+            except sqlite3.IntegrityError:
+                raise WorkItemExists(id)
+        # Logged as the resulting row, so replicas apply it without knowing what it changed
+        conn.execute("INSERT INTO changes (op, id, item) VALUES ('put', ?, ?)", (id, json.dumps(item)))
+
+    async def close(self):
+        await self._drain()
+        if self._write_conn is not None:
+            self._write_conn.close()
+            self._write_conn = None
+        self._conn.close()
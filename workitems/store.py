@@ -0,0 +1,227 @@
+import asyncio
+import bisect
+import sys
+from typing import Iterable, Optional, Union
+
+from pydantic import BaseModel
+
+
+class WorkItemsDTO(BaseModel):
+    ID: int
+    WorkItemType: str
+    Title: str
+    AssignedTo: str
+    State: str
+    Tags: str
+
+
+FIELDS = tuple(WorkItemsDTO.model_fields)
+
+# Fields that get a secondary index (field value -> ascending list of IDs)
+INDEXED_FIELDS = ("WorkItemType", "State", "AssignedTo")
+
+
+class WorkItemRecord:
+    """Compact in-memory form of a work item.
+
+    A slotted object with interned strings for the low-cardinality fields
+    takes about a seventh of the memory of a pydantic WorkItemsDTO. Records are
+    only turned into DTOs at the response boundary.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, ID: int, WorkItemType: str, Title: str, AssignedTo: str, State: str, Tags: str):
+        self.ID = ID
+        self.WorkItemType = sys.intern(WorkItemType)
+        self.Title = Title
+        self.AssignedTo = sys.intern(AssignedTo)
+        self.State = sys.intern(State)
+        self.Tags = sys.intern(Tags)
+
+    @classmethod
+    def from_dto(cls, dto: WorkItemsDTO) -> "WorkItemRecord":
+        return cls(dto.ID, dto.WorkItemType, dto.Title, dto.AssignedTo, dto.State, dto.Tags)
+
+    def to_dto(self) -> WorkItemsDTO:
+        return WorkItemsDTO.model_construct(**self.to_dict())
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in FIELDS}
+
+
+def _contains(ids: list[int], id: int) -> bool:
+    position = bisect.bisect_left(ids, id)
+    return position < len(ids) and ids[position] == id
+
+
+def split_tags(tags: str) -> list[str]:
+    """Split an Azure DevOps style tag string ("tag1; tag2") into tags."""
+    return [tag.strip() for tag in tags.split(";") if tag.strip()]
+
+
+class WorkItemStore:
+    """In-memory work item store keyed by ID with secondary indexes.
+
+    Reads are lock-free dict lookups. Writers serialize on an asyncio lock so
+    the primary map and the indexes never disagree between awaits.
+
+    IDs are also kept in ascending order for cursor pagination. New IDs are
+    usually larger than every existing one and are simply appended; deleted
+    IDs are skipped lazily and purged once they make up half of the list.
+    Index postings are ascending ID lists too, so a filtered page starts at
+    the cursor instead of sorting every match.
+    """
+
+    def __init__(self):
+        self._items: dict[int, WorkItemRecord] = {}
+        self._indexes: dict[str, dict[str, list[int]]] = {field: {} for field in INDEXED_FIELDS}
+        self._tags: dict[str, list[int]] = {}
+        self._order: list[int] = []
+        self._stale = 0
+        self._listeners = []
+        self.lock = asyncio.Lock()
+
+    def add_listener(self, listener):
+        """Register an object with `added(item)` and `removed(item)` methods.
+
+        `removed` is called before an item leaves the store or is replaced and
+        `added` after it is inserted or replaces one, so listeners can maintain
+        derived indexes incrementally.
+        """
+        self._listeners.append(listener)
+        for item in self._items.values():
+            listener.added(item)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, id: int):
+        return id in self._items
+
+    def get(self, id: int) -> Optional[WorkItemRecord]:
+        return self._items.get(id)
+
+    def all(self) -> list[WorkItemRecord]:
+        return list(self._items.values())
+
+    def ids_where(self, field: str, value: str) -> list[int]:
+        """Return the IDs whose indexed `field` equals `value`, ascending. Don't modify the list."""
+        return self._indexes[field].get(value, [])
+
+    def ids_tagged(self, tag: str) -> list[int]:
+        return self._tags.get(tag, [])
+
+    def query(self, filters: Optional[dict[str, str]] = None, tag: Optional[str] = None,
+              after: Optional[int] = None, limit: Optional[int] = None) -> tuple[list[WorkItemRecord], Optional[int]]:
+        """Return items matching all filters in ID order, starting after the `after` cursor.
+
+        The second element is the cursor for the next page, or None on the last page.
+        The smallest matching posting is walked from the cursor and the others
+        are probed by binary search, so a page costs about its length, not the
+        size of the filtered set.
+        """
+        candidates = [self.ids_where(field, value) for field, value in (filters or {}).items()]
+        if tag is not None:
+            candidates.append(self.ids_tagged(tag))
+
+        if candidates:
+            candidates.sort(key=len)
+            ids, others = candidates[0], candidates[1:]
+        else:
+            # May contain deleted IDs; they are skipped below
+            ids, others = self._order, []
+        position = bisect.bisect_right(ids, after) if after is not None else 0
+        page = []
+        while position < len(ids):
+            id = ids[position]
+            position += 1
+            if others and not all(_contains(other, id) for other in others):
+                continue
+            item = self._items.get(id)
+            if item is not None:
+                if limit is not None and len(page) == limit:
+                    return page, page[-1].ID
+                page.append(item)
+        return page, None
+
+    def _compact_order(self) -> list[int]:
+        if self._stale:
+            self._order = [id for id in self._order if id in self._items]
+            self._stale = 0
+        return self._order
+
+    def _index(self, item: WorkItemRecord):
+        for field in INDEXED_FIELDS:
+            self._add(self._indexes[field], getattr(item, field), item.ID)
+        for tag in split_tags(item.Tags):
+            self._add(self._tags, tag, item.ID)
+        for listener in self._listeners:
+            listener.added(item)
+
+    def _unindex(self, item: WorkItemRecord):
+        for field in INDEXED_FIELDS:
+            self._discard(self._indexes[field], getattr(item, field), item.ID)
+        for tag in split_tags(item.Tags):
+            self._discard(self._tags, tag, item.ID)
+        for listener in self._listeners:
+            listener.removed(item)
+
+    @staticmethod
+    def _add(index: dict[str, list[int]], value: str, id: int):
+        ids = index.setdefault(value, [])
+        if not ids or id > ids[-1]:
+            ids.append(id)
+        elif not _contains(ids, id):
+            bisect.insort(ids, id)
+
+    @staticmethod
+    def _discard(index: dict[str, list[int]], value: str, id: int):
+        ids = index.get(value)
+        if ids is not None:
+            position = bisect.bisect_left(ids, id)
+            if position < len(ids) and ids[position] == id:
+                del ids[position]
+            if not ids:
+                del index[value]
+
+    # --- Mutations. Callers that may interleave with other writers must hold `lock`.
+
+    def load(self, items: Iterable[Union[WorkItemRecord, WorkItemsDTO]]):
+        # In ID order, so the ID list and every posting are built by appending
+        for item in sorted(items, key=lambda item: item.ID):
+            self.put(item)
+
+    def put(self, item: Union[WorkItemRecord, WorkItemsDTO]) -> WorkItemRecord:
+        """Insert or replace an item, keeping the indexes in sync."""
+        if isinstance(item, WorkItemsDTO):
+            item = WorkItemRecord.from_dto(item)
+        old = self._items.get(item.ID)
+        if old is not None:
+            self._unindex(old)
+        elif not self._order or item.ID > self._order[-1]:
+            self._order.append(item.ID)
+        else:
+            index = bisect.bisect_left(self._order, item.ID)
+            if index < len(self._order) and self._order[index] == item.ID:
+                # Re-created after a delete: the stale entry becomes live again
+                self._stale -= 1
+            else:
+                self._order.insert(index, item.ID)
+        self._items[item.ID] = item
+        self._index(item)
+        return item
+
+    def clear(self):
+        for id in list(self._items):
+            self.delete(id)
+        self._compact_order()
+
+    def delete(self, id: int) -> Optional[WorkItemRecord]:
+        item = self._items.pop(id, None)
+        if item is not None:
+            self._unindex(item)
+            self._stale += 1
+            if self._stale > len(self._order) // 2:
+                self._compact_order()
+        return item